@@ -1,68 +1,452 @@
 # app.py
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, g, request, jsonify, send_file
 from flask_cors import CORS
+import functools
+import hashlib
+import hmac
+import html
+import logging
 import os
-import json
+import random
 import uuid
+import zipfile
+import tempfile
 import datetime
 import threading
 import time
-from src.report_generator import ReportGenerator
-from src.sharepoint import Sharepoint
-from src.utils import format_data, get_status_processo
-from src.config.logging import get_logger
+from contextlib import ExitStack
+from src.utils import NormalizedSections, format_data, get_status_processo
+from src.validation import ValidationError, validate_report_request, validate_preview_request
+from src.outline import build_outline, get_signing_area_name, get_textual_elements
+from src.scheduler import MemoryBudgetScheduler, count_headings, estimate_job_memory, get_peak_rss
+from src.metrics import REGISTRY, REPORT_JOB_SECONDS, REPORT_STAGE_SECONDS, Gauge
+from src.tracing import (
+    configure_exporter, current_span, current_trace_id, start_span, submit_with_context, trace_stage, traced,
+)
+from src.profiling import current_profile_state, run_profiled
+from src.storage import create_storage
+from src.mapping_registry import get_registry
+from src.config.logging import setup_logging
 import concurrent.futures
 
-logger = get_logger()
+# A importação deste módulo não tem efeitos colaterais (diretórios, threads, arquivo de log):
+# a aplicação é inicializada por create_app. ReportGenerator (docxtpl, python-docx, lxml) e
+# Sharepoint (shareplum, babel, dotenv) são importados apenas quando usados pela primeira vez.
+logger = logging.getLogger("api_logger")
 
 app = Flask(__name__)
 CORS(app)
 
-# Diretório onde os relatórios serão armazenados
-REPORTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src/reports')
-if not os.path.exists(REPORTS_DIR):
-    os.makedirs(REPORTS_DIR)
+# Template utilizado na geração dos relatórios
+TEMPLATE_PATH = "src/templates/Relatório Padrão - GRAAU.docx"
 
-# Diretório para armazenar relatórios em andamento
+# Diretórios do armazenamento local (STORAGE_BACKEND=local)
+# Relatórios gerados, metadados e parâmetros dos relatórios
+REPORTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src/reports')
+# Status dos relatórios em andamento
 PENDING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pending_reports')
-if not os.path.exists(PENDING_DIR):
-    os.makedirs(PENDING_DIR)
-
-# Diretório para armazenar imagens de capa temporárias
+# Imagens de capa temporárias
 COVER_IMAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src/temp_cover_images')
-if not os.path.exists(COVER_IMAGES_DIR):
-    os.makedirs(COVER_IMAGES_DIR)
 
-# Arquivo para rastrear os relatórios
-REPORTS_TRACKER = os.path.join(REPORTS_DIR, 'reports_tracker.json')
-if not os.path.exists(REPORTS_TRACKER):
-    with open(REPORTS_TRACKER, 'w') as f:
-        json.dump([], f)
+# Tamanho dos blocos lidos do armazenamento ao gerar arquivos ZIP
+ZIP_CHUNK_SIZE = 256 * 1024
+# Tamanho dos blocos lidos ao calcular o SHA-256 dos relatórios gerados
+HASH_CHUNK_SIZE = 1024 * 1024
 
 # Configurações da API - TORNADAS FACILMENTE CONFIGURÁVEIS
 app.config['REPORT_EXPIRATION_MINUTES'] = 15  # Valor padrão de 15 minutos
 app.config['CLEANUP_INTERVAL_SECONDS'] = 300  # Verificar a cada 5 minutos
+app.config['COVER_IMAGE_EXPIRATION_MINUTES'] = 24 * 60  # Imagens de capa enviadas e ainda não usadas em um relatório
 app.config['ALLOWED_IMAGE_EXTENSIONS'] = {'png', 'jpg', 'jpeg'}
 app.config['MAX_IMAGE_SIZE'] = 5 * 1024 * 1024  # 5MB
+app.config['MEMORY_BUDGET_MB'] = 1024  # Memória estimada máxima para relatórios em geração simultânea
+app.config['TRACE_EXPORT_FILE'] = os.getenv('TRACE_EXPORT_FILE')  # Arquivo JSON-lines (Zipkin v2) para os spans; None desativa
+app.config['PROFILE_SAMPLE_RATE'] = 0.0  # Fração das tarefas de geração perfiladas automaticamente (0 desativa)
+app.config['ADMIN_TOKEN'] = os.getenv('ADMIN_TOKEN')  # Token dos endpoints administrativos; sem valor, ficam desativados
+app.config['MAX_ZIP_REPORTS'] = 20  # Quantidade máxima de relatórios por download em ZIP
+app.config['DOCX_OPTIMIZE'] = True  # Otimização de tamanho dos DOCX gerados (mídias não referenciadas, compressão)
+app.config['DOCX_COMPRESSION_LEVEL'] = 9  # Nível de compressão (0 a 9) das partes XML na otimização
+app.config['STORAGE_BACKEND'] = os.getenv('STORAGE_BACKEND', 'local')  # "local" (diretórios acima) ou "s3"
+app.config['S3_BUCKET'] = os.getenv('S3_BUCKET')  # Bucket do backend S3
+app.config['S3_PREFIX'] = os.getenv('S3_PREFIX', '')  # Prefixo das chaves no bucket (ex.: "graau/")
+app.config['S3_ENDPOINT_URL'] = os.getenv('S3_ENDPOINT_URL')  # Endpoint compatível com S3 (ex.: MinIO); None usa o da AWS
+app.config['S3_EXPIRATION_DAYS'] = 1  # Expiração dos objetos do S3_PREFIX no próprio bucket, além da limpeza periódica (None desativa; requer S3_PREFIX)
+app.config['MAPPINGS_RELOAD_INTERVAL_SECONDS'] = 5  # Verificação de alterações em src/mappings (recarga sem reiniciar a API)
+app.config['APP_ROLE'] = os.getenv('APP_ROLE', 'all')  # "all" (API e geração de relatórios) ou "api" (sem geração)
+app.config['WARMUP'] = os.getenv('WARMUP')  # Pré-carregamentos ao iniciar ("templates,sharepoint,mappings"); None usa o padrão do papel
+
+# Papéis dos processos da API
+APP_ROLES = ("all", "api")
+# Pré-carregamentos disponíveis e os padrões de cada papel (o SharePoint exige rede e credenciais: apenas sob demanda)
+WARMUP_COMPONENTS = ("templates", "sharepoint", "mappings")
+DEFAULT_WARMUP = {"all": ("templates", "mappings"), "api": ()}
+
+# Criados por create_app
+# Armazenamento dos relatórios, imagens de capa e arquivos de status
+storage = None
+# Pool de threads para processamento assíncrono e admissão das tarefas conforme o orçamento de memória
+executor = None
+scheduler = None
+# Pool de threads para consultas ao SharePoint feitas durante a geração
+sharepoint_executor = None
 
-# Pool de threads para processamento assíncrono
-executor = concurrent.futures.ThreadPoolExecutor(max_workers=5)
 # Dicionário para rastrear tarefas assíncronas
 tasks = {}
 
+app_initialized = False
+app_init_lock = threading.Lock()
+
+
+def create_app(config=None):
+    """
+    Inicializa a aplicação: logging, armazenamento, pools de tarefas, thread de limpeza e pré-carregamentos.
+    Executada uma única vez por processo; as chamadas seguintes retornam a mesma aplicação.
+    
+    Uso: `gunicorn "app:create_app()"`. Servida sem create_app (ex.: `gunicorn app:app`), a aplicação
+    é inicializada na primeira requisição.
+    
+    Args:
+        config: Configurações aplicadas sobre as padrão (ex.: {"APP_ROLE": "api", "WARMUP": ""}).
+    """
+    global app_initialized, storage, executor, scheduler, sharepoint_executor
+    with app_init_lock:
+        if app_initialized:
+            return app
+        
+        if config:
+            app.config.update(config)
+        role = app.config['APP_ROLE']
+        if role not in APP_ROLES:
+            raise ValueError(f"APP_ROLE inválido: {role}. Use: {', '.join(APP_ROLES)}")
+        
+        setup_logging()
+        configure_exporter(app.config['TRACE_EXPORT_FILE'])
+        
+        storage = create_storage(
+            app.config['STORAGE_BACKEND'],
+            directories={"reports": REPORTS_DIR, "pending": PENDING_DIR, "covers": COVER_IMAGES_DIR},
+            bucket=app.config['S3_BUCKET'],
+            prefix=app.config['S3_PREFIX'],
+            endpoint_url=app.config['S3_ENDPOINT_URL'],
+            expiration_days=app.config['S3_EXPIRATION_DAYS'],
+        )
+        
+        if role == "all":
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=5)
+            scheduler = MemoryBudgetScheduler(executor, app.config['MEMORY_BUDGET_MB'] * 1024 * 1024)
+            sharepoint_executor = concurrent.futures.ThreadPoolExecutor(max_workers=5)
+        
+        # Recarregar os mapeamentos quando os arquivos de src/mappings forem alterados
+        # (em todos os papéis: a pré-visualização, servida também pelo papel api, usa os mapeamentos)
+        get_registry().start_watcher(app.config['MAPPINGS_RELOAD_INTERVAL_SECONDS'])
+        
+        register_gauges()
+        
+        # Iniciar o thread de limpeza
+        threading.Thread(target=cleanup_old_reports, name="report-cleanup", daemon=True).start()
+        
+        warmup = app.config['WARMUP']
+        warm_up(DEFAULT_WARMUP[role] if warmup is None else [c.strip() for c in warmup.split(",") if c.strip()])
+        
+        app_initialized = True
+        logger.info(f"Aplicação inicializada (papel: {role})")
+        return app
+
+def register_gauges():
+    """Registra as métricas calculadas no momento da coleta (/metrics)."""
+    if scheduler is not None:
+        Gauge(
+            "graau_queue_depth",
+            "Tarefas aguardando execução, por pool.",
+            lambda: {
+                ("report",): scheduler.counts()[0] + executor._work_queue.qsize(),
+                ("sharepoint",): sharepoint_executor._work_queue.qsize(),
+            },
+            ["pool"],
+        )
+        Gauge(
+            "graau_active_workers",
+            "Tarefas de geração de relatórios em execução.",
+            lambda: max(0, scheduler.counts()[1] - executor._work_queue.qsize()),
+        )
+        Gauge(
+            "graau_memory_budget_bytes",
+            "Orçamento de memória estimada das tarefas de geração, em bytes.",
+            lambda: scheduler.memory()[0],
+        )
+        Gauge(
+            "graau_memory_in_use_bytes",
+            "Memória estimada das tarefas de geração em execução, em bytes.",
+            lambda: scheduler.memory()[1],
+        )
+        Gauge(
+            "graau_memory_peak_in_use_bytes",
+            "Maior memória estimada em uso simultâneo desde o início do processo, em bytes.",
+            lambda: scheduler.memory()[2],
+        )
+        Gauge(
+            "graau_process_peak_rss_bytes",
+            "Pico de memória residente do processo, em bytes.",
+            get_peak_rss,
+        )
+    Gauge(
+        "graau_reports_disk_usage_bytes",
+        "Espaço ocupado pelos relatórios no armazenamento, em bytes.",
+        lambda: storage.usage("reports/"),
+    )
+
+def warm_up(components):
+    """Pré-carrega os componentes informados, para que a primeira requisição não pague a inicialização."""
+    for component in components:
+        if component not in WARMUP_COMPONENTS:
+            logger.warning(f"Pré-carregamento desconhecido ignorado: {component}")
+            continue
+        start = time.perf_counter()
+        try:
+            if component == "templates":
+                new_report_generator().warm_up()
+            elif component == "sharepoint":
+                # Autentica e mantém a sessão compartilhada pelas consultas seguintes
+                new_sharepoint()
+            else:
+                get_registry()
+            logger.info(f"Pré-carregamento de {component} concluído em {(time.perf_counter() - start) * 1000:.0f} ms")
+        except Exception as e:
+            # Falhas no pré-carregamento não impedem a inicialização: o componente é carregado no primeiro uso
+            logger.error(f"Erro no pré-carregamento de {component}: {str(e)}")
+
+def new_report_generator(**kwargs):
+    """Cria um ReportGenerator para o template padrão, importando a pilha DOCX no primeiro uso."""
+    from src.report_generator import ReportGenerator
+    return ReportGenerator(TEMPLATE_PATH, **kwargs)
+
+def new_sharepoint():
+    """Cria um cliente do SharePoint, importando shareplum no primeiro uso."""
+    from src.sharepoint import Sharepoint
+    return Sharepoint()
+
+
+def get_report_key(filename):
+    """Retorna a chave de um relatório gerado no armazenamento."""
+    return f"reports/{filename}"
+
+def get_cover_image_key(filename):
+    """Retorna a chave de uma imagem de capa no armazenamento."""
+    return f"covers/{filename}"
+
+def get_status_key(task_id):
+    """Retorna a chave do arquivo de status de uma tarefa no armazenamento."""
+    return f"pending/{task_id}.json"
+
+def save_task_status(task_id, status, message, progress, **extra):
+    """Grava o status de uma tarefa (gravação atômica: consultas simultâneas nunca leem um arquivo incompleto)."""
+    # Perfil solicitado, mas não capturado (outra tarefa estava sendo perfilada)
+    if current_profile_state() is False:
+        extra["profiled"] = False
+    storage.write_json(get_status_key(task_id), {
+        "status": status,
+        "message": message,
+        "progress": progress,
+        "created_at": datetime.datetime.now().isoformat(),
+        **extra
+    })
+
+def get_report_metadata_key(task_id):
+    """
+    Retorna a chave dos metadados de um relatório concluído (um objeto por relatório, gravado uma única vez:
+    instâncias da API que compartilham o armazenamento nunca sobrescrevem os registros umas das outras).
+    """
+    return f"reports/{task_id}.meta.json"
+
+def get_report_params_key(task_id):
+    """Retorna a chave do arquivo com os parâmetros usados para gerar um relatório."""
+    return f"reports/{task_id}.params.json"
+
+def save_report_params(task_id, report_params):
+    """Salva os parâmetros de um relatório, permitindo derivar novos relatórios a partir dele."""
+    storage.write_json(get_report_params_key(task_id), report_params)
+
+def load_report_params(task_id):
+    """Carrega os parâmetros usados para gerar um relatório."""
+    report_params = storage.read_json(get_report_params_key(task_id), {})
+    # As seções foram gravadas já normalizadas (após a validação da requisição)
+    if isinstance(report_params.get('seccoes'), list):
+        report_params['seccoes'] = NormalizedSections(report_params['seccoes'])
+    return report_params
 
-def load_reports_tracker():
-    """Carrega o rastreador de relatórios do arquivo JSON."""
+def get_profile_keys(task_id):
+    """Retorna as chaves do perfil de CPU e do relatório de alocações de uma tarefa perfilada."""
+    return (f"reports/{task_id}.profile.prof", f"reports/{task_id}.allocations.txt")
+
+def is_admin_request():
+    """Verifica se a requisição traz o token de administrador (cabeçalho X-Admin-Token)."""
+    token = request.headers.get("X-Admin-Token", "")
+    # Comparação em bytes: compare_digest não aceita strings com caracteres não ASCII
+    return bool(app.config['ADMIN_TOKEN']) and hmac.compare_digest(token.encode(), app.config['ADMIN_TOKEN'].encode())
+
+def find_report(report_id, partial=False):
+    """
+    Busca um relatório concluído pelo ID da tarefa ou pelo nome do arquivo.
+    Com `partial`, aceita também parte do nome do arquivo.
+    """
     try:
-        with open(REPORTS_TRACKER, 'r') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        return []
+        report = storage.read_json(get_report_metadata_key(report_id))
+        if report:
+            return report
+        
+        # Busca pelo nome do arquivo, que termina com o início do ID da tarefa (relatorio_<data>_<hora>_<id>.docx)
+        for obj in storage.list(get_report_key("relatorio_")):
+            filename = obj.key.rsplit("/", 1)[-1]
+            if filename != report_id and not (partial and report_id in filename):
+                continue
+            task_id_prefix = filename.rsplit("_", 1)[-1].removesuffix(".docx")
+            for metadata in storage.list(get_report_key(task_id_prefix)):
+                if metadata.key.endswith(".meta.json"):
+                    report = storage.read_json(metadata.key)
+                    if report and report['filename'] == filename:
+                        return report
+    except ValueError:
+        # ID com caracteres inválidos para uma chave do armazenamento
+        pass
+    return None
+
+def file_sha256(path):
+    """Calcula o SHA-256 de um arquivo, lido em blocos."""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+@traced("fetch_sharepoint_data")
+def fetch_sharepoint_data(sharepoint_id):
+    """Obtém e transforma os dados de um item do SharePoint."""
+    sharepoint_data = new_sharepoint().get_acao_controle_data(item_id=sharepoint_id)
+    if not sharepoint_data:
+        raise ValueError(f"Item {sharepoint_id} não encontrado no SharePoint")
+    return sharepoint_data[0]
+
+def build_report_context(report_params):
+    """Formata os parâmetros do relatório e adiciona o status do processo."""
+    formatted_data = format_data(report_params)
+    
+    # Adiciona status do processo
+    tipo_relatorio = report_params.get("tipo_relatorio", "")
+    processo_tipo = report_params.get("processo_tipo", "")
+    status_processo = get_status_processo(tipo_relatorio, processo_tipo)
+    
+    if status_processo:
+        formatted_data["status_processo"] = status_processo
+    
+    return formatted_data
+
+def render_preview_html(outline, fields):
+    """Gera uma prévia HTML simples da estrutura de títulos e dos campos do relatório."""
+    parts = ['<div class="report-preview">', '<dl class="fields">']
+    for key, value in fields.items():
+        parts.append(f"<dt>{html.escape(str(key))}</dt><dd>{html.escape(str(value))}</dd>")
+    parts.append('</dl>')
+    
+    parts.append('<div class="outline">')
+    for entry in outline:
+        if entry["type"] == "signing_block":
+            parts.append(f'<div class="signing-block">Área de assinaturas ({html.escape(entry["section"])})</div>')
+            continue
+        if entry["page_break"]:
+            parts.append('<hr class="page-break">')
+        parts.append(f'<h{min(entry["level"], 6)}>{entry["number"]} {html.escape(entry["title"])}</h{min(entry["level"], 6)}>')
+    parts.append('</div>')
+    
+    parts.append('</div>')
+    return "".join(parts)
 
-def save_reports_tracker(tracker_data):
-    """Salva o rastreador de relatórios no arquivo JSON."""
-    with open(REPORTS_TRACKER, 'w') as f:
-        json.dump(tracker_data, f, indent=4)
+class ZipChunkBuffer:
+    """Destino do ZipFile que acumula os bytes escritos até serem enviados ao cliente."""
+    
+    def __init__(self):
+        self.chunks = []
+    
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self):
+        """Retorna (em um gerador) os bytes acumulados desde a última chamada."""
+        if self.chunks:
+            data = b"".join(self.chunks)
+            self.chunks.clear()
+            yield data
+
+def stream_reports_zip(reports):
+    """Gera o arquivo ZIP com os relatórios em blocos, sem arquivo temporário nem o ZIP inteiro em memória."""
+    buffer = ZipChunkBuffer()
+    names = set()
+    # Os DOCX já são compactados: armazenados sem nova compressão
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        for report in reports:
+            # Nomes repetidos recebem um sufixo, como "Relatório (2).docx"
+            name = f"{report['download_name']}.docx"
+            copy = 1
+            while name in names:
+                copy += 1
+                name = f"{report['download_name']} ({copy}).docx"
+            names.add(name)
+            
+            report_key = get_report_key(report['filename'])
+            info = zipfile.ZipInfo(name, date_time=datetime.datetime.fromisoformat(report['created_at']).timetuple()[:6])
+            info.file_size = report.get('size') or storage.size(report_key)
+            
+            with storage.open(report_key) as source, archive.open(info, 'w') as target:
+                while chunk := source.read(ZIP_CHUNK_SIZE):
+                    target.write(chunk)
+                    yield from buffer.drain()
+            yield from buffer.drain()
+    yield from buffer.drain()
+
+@app.before_request
+def ensure_app_initialized():
+    """Inicializa a aplicação na primeira requisição, quando servida sem create_app."""
+    if not app_initialized:
+        create_app()
+
+def rendering_endpoint(view):
+    """Endpoints que geram documentos ou consultam o SharePoint: indisponíveis nos processos com APP_ROLE "api"."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if app.config['APP_ROLE'] != "all":
+            return jsonify({"error": "Geração de relatórios indisponível nesta instância"}), 503
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.before_request
+def start_request_span():
+    """Abre o span raiz da requisição, continuando o trace do cabeçalho `traceparent`, se enviado."""
+    route = request.url_rule.rule if request.url_rule else request.path
+    g.request_span = start_span(
+        f"{request.method} {route}",
+        kind="SERVER",
+        traceparent=request.headers.get("traceparent"),
+        **{"http.method": request.method, "http.path": request.path}
+    ).__enter__()
+
+@app.after_request
+def add_trace_header(response):
+    """Informa o ID do trace na resposta, para localizar os spans e as linhas de log da requisição."""
+    span = g.get("request_span")
+    if span:
+        span.set_attribute("http.status_code", response.status_code)
+        response.headers["X-Trace-Id"] = span.trace_id
+    return response
+
+@app.teardown_request
+def end_request_span(error=None):
+    """Finaliza o span raiz da requisição."""
+    span = g.pop("request_span", None)
+    if span:
+        span.__exit__(type(error) if error else None, error, None)
 
 def allowed_file(filename):
     """Verifica se o arquivo possui uma extensão permitida."""
@@ -73,138 +457,223 @@ def cleanup_old_reports():
     """Remove relatórios antigos com base na configuração REPORT_EXPIRATION_MINUTES."""
     while True:
         logger.debug(f"Iniciando limpeza de relatórios antigos (limite: {app.config['REPORT_EXPIRATION_MINUTES']} minutos)")
-        tracker_data = load_reports_tracker()
         current_time = datetime.datetime.now()
-        updated_tracker = []
-        
-        for report in tracker_data:
-            created_date = datetime.datetime.fromisoformat(report['created_at'])
+        expired_reports = []
+        
+        # Uma falha do armazenamento (ex.: S3 indisponível) não pode encerrar a thread: a limpeza é refeita no próximo ciclo
+        try:
+            metadata_keys = [obj.key for obj in storage.list("reports/") if obj.key.endswith(".meta.json")]
+        except Exception as e:
+            metadata_keys = []
+            logger.error(f"Erro ao listar os relatórios registrados: {str(e)}")
+        
+        for metadata_key in metadata_keys:
+            try:
+                report = storage.read_json(metadata_key)
+                if not report:
+                    continue
+                created_date = datetime.datetime.fromisoformat(report['created_at'])
+            except Exception as e:
+                # Metadados inválidos ou removidos por outra instância durante a varredura: ignorados neste ciclo
+                # (os arquivos inválidos são removidos pela expiração dos arquivos sem metadados, abaixo)
+                logger.warning(f"Metadados de relatório ignorados na limpeza ({metadata_key}): {str(e)}")
+                continue
             age_minutes = (current_time - created_date).total_seconds() / 60
             
             if age_minutes > app.config['REPORT_EXPIRATION_MINUTES']:
-                report_path = os.path.join(REPORTS_DIR, report['filename'])
-                try:
-                    if os.path.exists(report_path):
-                        os.remove(report_path)
-                        logger.debug(f"Relatório excluído: {report['filename']}")
-                        
-                    # Remover imagem de capa associada, se houver
-                    if 'cover_image' in report and report['cover_image']:
-                        cover_path = os.path.join(COVER_IMAGES_DIR, report['cover_image'])
-                        if os.path.exists(cover_path):
-                            os.remove(cover_path)
-                            logger.debug(f"Imagem de capa excluída: {report['cover_image']}")
-                            
-                    # Remover arquivo de status
-                    status_file = os.path.join(PENDING_DIR, f"{report.get('task_id', '')}.json")
-                    if os.path.exists(status_file):
-                        os.remove(status_file)
-                        
-                except Exception as e:
-                    logger.error(f"Erro ao excluir relatório {report['filename']}: {str(e)}")
-            else:
-                updated_tracker.append(report)
-        
-        save_reports_tracker(updated_tracker)
-        logger.debug(f"Limpeza concluída. {len(tracker_data) - len(updated_tracker)} relatórios removidos.")
+                expired_reports.append(report)
+        
+        # Cada relatório é removido individualmente; os metadados por último, para que uma falha seja refeita
+        # na próxima limpeza (outras instâncias podem remover o mesmo relatório: as exclusões são idempotentes)
+        for report in expired_reports:
+            try:
+                if report.get('filename'):
+                    storage.delete(get_report_key(report['filename']))
+                    logger.debug(f"Relatório excluído: {report['filename']}")
+                
+                # Remover imagem de capa associada, se houver
+                if 'cover_image' in report and report['cover_image']:
+                    storage.delete(get_cover_image_key(report['cover_image']))
+                    logger.debug(f"Imagem de capa excluída: {report['cover_image']}")
+                
+                # Remover arquivo de status, parâmetros do relatório e perfis da tarefa, se houver
+                task_id = report.get('task_id', '')
+                for key in (get_status_key(task_id), get_report_params_key(task_id), *get_profile_keys(task_id)):
+                    storage.delete(key)
+                
+                storage.delete(get_report_metadata_key(task_id))
+                    
+            except Exception as e:
+                logger.error(f"Erro ao excluir relatório {report.get('filename')}: {str(e)}")
+        
+        # Imagens de capa não utilizadas, status de tarefas que falharam e arquivos de relatórios sem metadados
+        # (ex.: geração interrompida antes do registro) não são alcançados pela remoção acima
+        try:
+            expiration_seconds = app.config['REPORT_EXPIRATION_MINUTES'] * 60
+            orphans = sum(storage.expire(prefix, expiration_seconds) for prefix in ("pending/", "reports/"))
+            # As imagens de capa podem ser enviadas bem antes da geração: prazo próprio, nunca menor que o dos relatórios
+            cover_expiration_seconds = max(app.config['COVER_IMAGE_EXPIRATION_MINUTES'] * 60, expiration_seconds)
+            orphans += storage.expire("covers/", cover_expiration_seconds)
+        except Exception as e:
+            orphans = 0
+            logger.error(f"Erro ao excluir arquivos temporários expirados: {str(e)}")
+        
+        logger.debug(f"Limpeza concluída. {len(expired_reports)} relatórios e {orphans} arquivos temporários removidos.")
         
         # Executar a limpeza com base no intervalo configurado
         time.sleep(app.config['CLEANUP_INTERVAL_SECONDS'])
 
 
-# Iniciar o thread de limpeza ao iniciar a aplicação
-cleanup_thread = threading.Thread(target=cleanup_old_reports, daemon=True)
-cleanup_thread.start()
 
-
-def generate_report_task(data, filepath, task_id, cover_image_path=None):
+@traced("generate_report_task")
+def generate_report_task(data, filename, task_id, cover_image=None, base_report=None):
     """Função para gerar o relatório de forma assíncrona."""
+    job_start = time.perf_counter()
+    current_span().set_attribute("task_id", task_id)
     try:
         logger.info(f"Iniciando geração assíncrona do relatório: {task_id}")
         
+        # Iniciar a consulta ao SharePoint, se solicitada, em paralelo à preparação do template
+        sharepoint_future = None
+        if data.get('sharepoint_id'):
+            sharepoint_future = submit_with_context(sharepoint_executor, fetch_sharepoint_data, data['sharepoint_id'])
+        
         # Criar um arquivo de status para acompanhamento
-        status_file = os.path.join(PENDING_DIR, f"{task_id}.json")
-        with open(status_file, 'w') as f:
-            json.dump({
-                "status": "processing",
-                "message": "Obtendo dados do SharePoint",
-                "progress": 10,
-                "created_at": datetime.datetime.now().isoformat()
-            }, f, indent=4)
-        
-        # Atualizar status
-        with open(status_file, 'w') as f:
-            json.dump({
-                "status": "processing",
-                "message": "Gerando relatório com os dados obtidos",
-                "progress": 50,
-                "created_at": datetime.datetime.now().isoformat()
-            }, f, indent=4)
+        save_task_status(task_id, "processing", "Obtendo dados do SharePoint" if sharepoint_future else "Preparando template", 10)
         
         # Gerar relatório
-        report_generator = ReportGenerator("src/templates/Relatório Padrão - GRAAU.docx")
+        report_generator = new_report_generator(
+            optimize=app.config['DOCX_OPTIMIZE'],
+            compression_level=app.config['DOCX_COMPRESSION_LEVEL']
+        )
         
         # Adicionar parâmetros para o relatório
         report_params = data['report_params'].copy() if 'report_params' in data else {}
         
-        formatted_data = format_data(report_params)
-        
-        # Adiciona status do processo
-        tipo_relatorio = report_params.get("tipo_relatorio", "")
-        processo_tipo = report_params.get("processo_tipo", "")
-        status_processo = get_status_processo(tipo_relatorio, processo_tipo)
-        
-        if status_processo:
-            formatted_data["status_processo"] = status_processo
+        # O documento é gerado em um diretório temporário e só então enviado ao armazenamento
+        with ExitStack() as local_files:
+            filepath = os.path.join(local_files.enter_context(tempfile.TemporaryDirectory(prefix="graau_")), filename)
+            
+            with trace_stage(REPORT_STAGE_SECONDS, "storage_download"):
+                cover_image_path = None
+                if cover_image:
+                    cover_image_path = local_files.enter_context(storage.local_file(get_cover_image_key(cover_image)))
+                if base_report:
+                    previous_path = local_files.enter_context(storage.local_file(get_report_key(base_report['filename'])))
+            
+            if base_report:
+                # Os parâmetros enviados são aplicados sobre os do relatório base
+                base_params = load_report_params(base_report['task_id'])
+                if sharepoint_future:
+                    with trace_stage(REPORT_STAGE_SECONDS, "sharepoint_wait"):
+                        report_params = {**sharepoint_future.result(), **report_params}
+                report_params = {**base_params, **report_params}
+                
+                # Atualizar status
+                save_task_status(task_id, "processing", "Gerando relatório com os dados obtidos", 50)
+                
+                base_context = build_report_context(base_params)
+                formatted_data = build_report_context(report_params)
+                changed_keys = {key for key in base_context.keys() | formatted_data.keys()
+                                if base_context.get(key) != formatted_data.get(key)}
+                
+                logger.info(f"Derivando relatório {task_id} de {base_report['task_id']} (campos alterados: {sorted(changed_keys)})")
+                
+                success = report_generator.derive_report(
+                    previous_path=previous_path,
+                    output_path=filepath,
+                    context=formatted_data,
+                    changed_keys=changed_keys,
+                    cover_image_path=cover_image_path
+                )
+            else:
+                # Carregar template e inserir títulos enquanto os dados do SharePoint são obtidos
+                headings = report_generator._get_textual_elements(format_data(report_params))
+                doc = report_generator.prepare_document(headings)
+                
+                if sharepoint_future:
+                    # Os valores enviados pelo cliente prevalecem sobre os do SharePoint
+                    with trace_stage(REPORT_STAGE_SECONDS, "sharepoint_wait"):
+                        report_params = {**sharepoint_future.result(), **report_params}
+                
+                # Atualizar status
+                save_task_status(task_id, "processing", "Gerando relatório com os dados obtidos", 50)
+                
+                formatted_data = build_report_context(report_params)
+                
+                success = report_generator.generate_report(
+                    context=formatted_data,
+                    output_path=filepath,
+                    cover_image_path=cover_image_path,
+                    doc=doc
+                )
+            
+            if not success:
+                raise RuntimeError("Falha na renderização do documento")
+            
+            # Hash do conteúdo, usado como ETag nos downloads
+            sha256 = file_sha256(filepath)
+            size = os.path.getsize(filepath)
+            
+            with trace_stage(REPORT_STAGE_SECONDS, "storage_upload"):
+                storage.put_file(get_report_key(filename), filepath)
         
-        report_generator.generate_report(
-            context=formatted_data,
-            output_path=filepath,
-            cover_image_path=cover_image_path
-        )
+        save_report_params(task_id, report_params)
         
-        # Registrar o relatório no rastreador
+        # Registrar o relatório (metadados usados nas consultas de status e nos downloads)
         report_info = {
-            "filename": os.path.basename(filepath),
+            "filename": filename,
             "created_at": datetime.datetime.now().isoformat(),
             "status": "completed",
             "task_id": task_id,
-            "cover_image": os.path.basename(cover_image_path) if cover_image_path else None,
-            "download_name":  data.get('nome_relatorio', os.path.basename(filepath)),
+            "cover_image": cover_image,
+            "download_name":  data.get('nome_relatorio', base_report['download_name'] if base_report else filename),
+            "base_task_id": base_report['task_id'] if base_report else None,
+            "sha256": sha256,
+            "size": size,
         }
         
-        tracker_data = load_reports_tracker()
-        tracker_data.append(report_info)
-        save_reports_tracker(tracker_data)
+        with trace_stage(REPORT_STAGE_SECONDS, "metadata_write"):
+            storage.write_json(get_report_metadata_key(task_id), report_info)
         
         # Atualizar status final
-        with open(status_file, 'w') as f:
-            json.dump({
-                "status": "completed",
-                "message": "Relatório gerado com sucesso",
-                "progress": 100,
-                "created_at": datetime.datetime.now().isoformat(),
-                "filename": os.path.basename(filepath)
-            }, f, indent=4)
+        save_task_status(task_id, "completed", "Relatório gerado com sucesso", 100, filename=filename)
         
         logger.info(f"Relatório gerado com sucesso: {task_id}")
+        REPORT_JOB_SECONDS.observe(time.perf_counter() - job_start, result="success")
         return report_info
         
     except Exception as e:
         error_message = f"Erro ao gerar relatório: {str(e)}"
         logger.error(error_message)
+        REPORT_JOB_SECONDS.observe(time.perf_counter() - job_start, result="error")
+        current_span().set_attribute("error", error_message)
         
         # Atualizar status com erro
-        with open(status_file, 'w') as f:
-            json.dump({
-                "status": "error",
-                "message": error_message,
-                "progress": 0,
-                "created_at": datetime.datetime.now().isoformat()
-            }, f, indent=4)
+        save_task_status(task_id, "error", error_message, 0)
         
         return {"error": error_message}
 
+def profile_report_task(task_id, *task_args):
+    """Executa a tarefa de geração sob perfil e grava os resultados no armazenamento."""
+    with tempfile.TemporaryDirectory(prefix="graau_") as work_dir:
+        cpu_path = os.path.join(work_dir, "profile.prof")
+        allocations_path = os.path.join(work_dir, "allocations.txt")
+        try:
+            return run_profiled(task_id, cpu_path, allocations_path, generate_report_task, *task_args)
+        finally:
+            # O perfil não é gravado se outra tarefa estava sendo perfilada
+            stored = False
+            for key, path in zip(get_profile_keys(task_id), (cpu_path, allocations_path)):
+                if os.path.exists(path):
+                    storage.put_file(key, path)
+                    stored = True
+            
+            # O status final é gravado pela tarefa antes do perfil: informa quando ele está disponível
+            status_data = storage.read_json(get_status_key(task_id)) if stored else None
+            if status_data:
+                storage.write_json(get_status_key(task_id), {**status_data, "profiled": True})
+
 @app.route('/api/upload-cover-image', methods=['POST'])
 def upload_cover_image():
     """Endpoint para fazer upload de uma imagem de capa."""
@@ -236,10 +705,9 @@ def upload_cover_image():
         image_id = str(uuid.uuid4())
         extension = file.filename.rsplit('.', 1)[1].lower()
         filename = f"cover_{image_id}.{extension}"
-        filepath = os.path.join(COVER_IMAGES_DIR, filename)
         
         # Salvar o arquivo
-        file.save(filepath)
+        storage.save_stream(get_cover_image_key(filename), file.stream)
         
         return jsonify({
             "success": True,
@@ -253,6 +721,7 @@ def upload_cover_image():
         return jsonify({"error": f"Erro ao processar upload: {str(e)}"}), 500
 
 @app.route('/api/sharepoint_data/<sharepoint_id>', methods=['GET'])
+@rendering_endpoint
 def get_sharepoint_data(sharepoint_id):
     """
     Endpoint para gerar um relatório baseado em dados JSON (de forma assíncrona).
@@ -261,7 +730,7 @@ def get_sharepoint_data(sharepoint_id):
     """
     try:        
         # Obter dados do SharePoint
-        sharepoint = Sharepoint()
+        sharepoint = new_sharepoint()
         sharepoint_data = sharepoint.get_acao_controle_data(item_id=sharepoint_id)
         
         return jsonify(sharepoint_data[0]), 202
@@ -271,6 +740,7 @@ def get_sharepoint_data(sharepoint_id):
         return jsonify({"error": f"Erro ao recuperar informações do Sharepoint: {str(e)}"}), 500
 
 @app.route('/api/generate-report', methods=['POST'])
+@rendering_endpoint
 def generate_report():
     """
     Endpoint para gerar um relatório baseado em dados JSON (de forma assíncrona).
@@ -278,35 +748,70 @@ def generate_report():
     - report_params: Parâmetros para gerar o relatório
     - cover_image_id: ID da imagem de capa previamente enviada
     - nome_relatorio: Nome do relatório a ser gerado e mostrado no download
+    - base_task_id: ID de um relatório já gerado do qual o novo será derivado (opcional).
+      Nesse caso, report_params contém apenas os campos alterados.
+    - sharepoint_id: ID do item no SharePoint (opcional). Os dados do item são obtidos
+      durante a geração, sem necessidade de consultar /api/sharepoint_data antes.
+    - profile: Captura o perfil de CPU e de alocações da tarefa (opcional, requer X-Admin-Token).
     """
     try:
-        data = request.json
+        data = request.get_json(silent=True)
         if not data:
             return jsonify({"error": "Nenhum dado JSON recebido"}), 400
         
-        # Validação de campos obrigatórios
-        required_fields = ['report_params', 'nome_relatorio']
-        missing_fields = [field for field in required_fields if field not in data]
-        if missing_fields:
-            return jsonify({"error": f"Campo(s) obrigatório(s) ausente(s): {', '.join(missing_fields)}"}), 400
+        # Validação do payload (campos obrigatórios, tipos e estrutura das seções) antes de ocupar o executor
+        try:
+            data = validate_report_request(data)
+        except ValidationError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        # Relatório base para geração incremental, se informado
+        base_report = None
+        if data.get('base_task_id'):
+            base_report = find_report(data['base_task_id'])
+            if not base_report or not storage.exists(get_report_key(base_report['filename'])):
+                return jsonify({"error": "Relatório base não encontrado"}), 404
+        
+        # Perfil sob demanda (apenas administradores) ou por amostragem
+        profile = data.get('profile', False)
+        if profile and not is_admin_request():
+            return jsonify({"error": "Token de administrador inválido"}), 403
+        if not profile and app.config['PROFILE_SAMPLE_RATE'] > 0:
+            profile = random.random() < app.config['PROFILE_SAMPLE_RATE']
         
         # Verificar a imagem de capa, se informada
-        cover_image_path = None
+        cover_image = None
         if 'cover_image_id' in data and data['cover_image_id']:
             # Procurar a imagem pelo ID
-            for filename in os.listdir(COVER_IMAGES_DIR):
-                if data['cover_image_id'] in filename:
-                    cover_image_path = os.path.join(COVER_IMAGES_DIR, filename)
-                    break
+            covers = storage.list(get_cover_image_key(f"cover_{data['cover_image_id']}"))
+            if covers:
+                cover_image = os.path.basename(covers[0].key)
         
         # Gerar nome de arquivo único
         timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         task_id = str(uuid.uuid4())
         filename = f"{'relatorio'}_{timestamp}_{task_id[:8]}.docx"
-        filepath = os.path.join(REPORTS_DIR, filename)
         
-        # Iniciar geração de relatório em thread separada
-        future = executor.submit(generate_report_task, data, filepath, task_id, cover_image_path)
+        # Estimar a memória da tarefa a partir das seções, do payload e dos arquivos utilizados
+        file_bytes = covers[0].size if cover_image else 0
+        if base_report:
+            file_bytes += storage.size(get_report_key(base_report['filename']))
+        estimated_bytes = estimate_job_memory(
+            heading_count=count_headings(data.get('report_params', {}).get('seccoes')),
+            payload_bytes=request.content_length or 0,
+            file_bytes=file_bytes
+        )
+        
+        # Iniciar geração de relatório em thread separada, quando houver orçamento de memória
+        task_args = (data, filename, task_id, cover_image, base_report)
+        if profile:
+            # Sem perfil, a tarefa é executada diretamente, sem nenhum custo adicional
+            task_args = (profile_report_task, task_id) + task_args
+        else:
+            task_args = (generate_report_task,) + task_args
+        # Status inicial: a tarefa pode aguardar orçamento de memória ou um worker livre antes de começar
+        save_task_status(task_id, "queued", "Aguardando início da geração", 0)
+        future = scheduler.submit(task_id, estimated_bytes, *task_args)
         tasks[task_id] = future
         
         # Retornar imediatamente com o ID da tarefa
@@ -314,6 +819,8 @@ def generate_report():
             "success": True,
             "message": "Geração de relatório iniciada",
             "task_id": task_id,
+            "trace_id": current_trace_id(),
+            "profile_requested": profile,
             "status": "processing"
         }), 202
         
@@ -322,40 +829,70 @@ def generate_report():
         return jsonify({"error": f"Erro ao iniciar geração de relatório: {str(e)}"}), 500
 
 
+@app.route('/api/preview-report', methods=['POST'])
+def preview_report():
+    """
+    Endpoint para pré-visualizar a estrutura do relatório de forma síncrona, sem gerar o DOCX.
+    Espera receber um JSON com:
+    - report_params: Parâmetros do relatório (mesmo formato de /api/generate-report)
+    Retorna HTML quando chamado com ?format=html.
+    """
+    try:
+        try:
+            data = validate_preview_request(request.get_json(silent=True))
+        except ValidationError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        formatted_data = build_report_context(data['report_params'])
+        
+        # A estrutura é calculada sem carregar o template (disponível também no papel api)
+        textual_elements = get_textual_elements(formatted_data)
+        outline = build_outline(textual_elements)
+        
+        fields = {key: value for key, value in formatted_data.items() if key != "seccoes"}
+        
+        if request.args.get('format') == 'html':
+            return render_preview_html(outline, fields), 200, {'Content-Type': 'text/html; charset=utf-8'}
+        
+        return jsonify({
+            "outline": outline,
+            "signing_area": get_signing_area_name(textual_elements),
+            "fields": fields
+        })
+        
+    except Exception as e:
+        logger.error(f"Erro ao gerar prévia do relatório: {str(e)}")
+        return jsonify({"error": f"Erro ao gerar prévia do relatório: {str(e)}"}), 500
+
+
 @app.route('/api/report-status/<task_id>', methods=['GET'])
 def get_report_status(task_id):
     """Verifica o status de uma tarefa de geração de relatório."""
     try:
-        status_file = os.path.join(PENDING_DIR, f"{task_id}.json")
+        status_data = storage.read_json(get_status_key(task_id))
         
-        if os.path.exists(status_file):
-            with open(status_file, 'r') as f:
-                status_data = json.load(f)
-                
+        if status_data:
             # Se estiver completo, adicionar link para download
             if status_data["status"] == "completed":
-                tracker_data = load_reports_tracker()
-                for report in tracker_data:
-                    if report.get("task_id") == task_id:
-                        status_data["download_url"] = f"/api/reports/{task_id}"
-                        status_data["filename"] = report["filename"],
-                        status_data["download_name"] = report["download_name"]
-                        break
+                report = find_report(task_id)
+                if report:
+                    status_data["download_url"] = f"/api/reports/{task_id}"
+                    status_data["filename"] = report["filename"]
+                    status_data["download_name"] = report["download_name"]
             
             return jsonify(status_data)
         
-        # Verificar se está no tracker (processamento pode ter terminado, mas ainda não removido)
-        tracker_data = load_reports_tracker()
-        for report in tracker_data:
-            if report.get("task_id") == task_id:
-                return jsonify({
-                    "status": "completed",
-                    "message": "Relatório gerado com sucesso",
-                    "progress": 100,
-                    "download_url": f"/api/reports/{task_id}",
-                    "filename": report["filename"],
-                    "download_name": report["download_name"]
-                })
+        # Verificar se o relatório está registrado (o status pode já ter sido removido)
+        report = find_report(task_id)
+        if report:
+            return jsonify({
+                "status": "completed",
+                "message": "Relatório gerado com sucesso",
+                "progress": 100,
+                "download_url": f"/api/reports/{task_id}",
+                "filename": report["filename"],
+                "download_name": report["download_name"]
+            })
         
         # Não encontrado
         return jsonify({"error": "Tarefa não encontrada"}), 404
@@ -364,31 +901,118 @@ def get_report_status(task_id):
         logger.error(f"Erro ao verificar status da tarefa {task_id}: {str(e)}")
         return jsonify({"error": f"Erro ao verificar status: {str(e)}"}), 500
 
-@app.route('/api/reports/<report_id>', methods=['GET'])
-def download_report(report_id):
-    """Download de um relatório específico com base no report_id."""
-    tracker_data = load_reports_tracker()
+@app.route('/api/scheduler-status', methods=['GET'])
+@rendering_endpoint
+def get_scheduler_status():
+    """Retorna o uso do orçamento de memória e a memória estimada por tarefa."""
+    return jsonify(scheduler.stats())
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Expõe as métricas da aplicação no formato texto do Prometheus."""
+    return Response(REGISTRY.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.route('/api/admin/profiles/<task_id>', methods=['GET'])
+def download_profile(task_id):
+    """
+    Download do perfil de uma tarefa de geração (requer X-Admin-Token).
+    Parâmetro `type`: "cpu" (padrão, formato pstats) ou "allocations" (texto).
+    """
+    if not is_admin_request():
+        return jsonify({"error": "Token de administrador inválido"}), 403
+    
+    profile_type = request.args.get("type", "cpu")
+    if profile_type not in ("cpu", "allocations"):
+        return jsonify({"error": "Tipo de perfil inválido. Use: cpu, allocations"}), 400
+    
+    cpu_key, allocations_key = get_profile_keys(task_id)
+    key = cpu_key if profile_type == "cpu" else allocations_key
+    try:
+        profile_file = storage.open(key)
+    except FileNotFoundError:
+        return jsonify({"error": "Perfil não encontrado"}), 404
+    
+    return send_file(
+        profile_file,
+        as_attachment=True,
+        download_name=os.path.basename(key),
+        mimetype='application/octet-stream' if profile_type == "cpu" else 'text/plain'
+    )
+
+@app.route('/api/reports/zip', methods=['GET'])
+def download_reports_zip():
+    """
+    Download de vários relatórios em um único arquivo ZIP, gerado em blocos durante o envio.
+    Parâmetro `ids`: IDs das tarefas separados por vírgula.
+    """
+    report_ids = list(dict.fromkeys(report_id for report_id in request.args.get("ids", "").split(",") if report_id))
+    if not report_ids:
+        return jsonify({"error": "Informe os relatórios no parâmetro ids"}), 400
+    if len(report_ids) > app.config['MAX_ZIP_REPORTS']:
+        return jsonify({"error": f"Máximo de {app.config['MAX_ZIP_REPORTS']} relatórios por arquivo ZIP"}), 400
+    
+    reports = [find_report(report_id) for report_id in report_ids]
+    missing = [report_id for report_id, report in zip(report_ids, reports)
+               if not report or not storage.exists(get_report_key(report['filename']))]
+    if missing:
+        return jsonify({"error": f"Relatórios não encontrados: {', '.join(missing)}"}), 404
     
-    # Encontrar o relatório pelo ID da tarefa
-    report = None
-    for r in tracker_data:
-        if report_id == r.get("task_id") or report_id in r['filename']:
-            report = r
-            break
+    # O ZIP é determinístico (mesmos nomes, datas e conteúdos), então o ETag deriva dos hashes dos relatórios
+    etag = None
+    if all(report.get('sha256') for report in reports):
+        etag = hashlib.sha256("\n".join(f"{report['download_name']}:{report['sha256']}" for report in reports).encode()).hexdigest()
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
     
+    response = Response(
+        stream_reports_zip(reports),
+        mimetype='application/zip',
+        headers={"Content-Disposition": "attachment; filename=relatorios.zip"}
+    )
+    if etag:
+        response.set_etag(etag)
+    return response
+
+@app.route('/api/reports/<report_id>', methods=['GET'])
+def download_report(report_id):
+    """
+    Download de um relatório específico com base no report_id.
+    Suporta requisições condicionais (ETag com o SHA-256 do arquivo) e parciais (Range), para retomar downloads.
+    """
+    # Aceita também parte do nome do arquivo
+    report = find_report(report_id, partial=True)
     if not report:
         return jsonify({"error": "Relatório não encontrado"}), 404
     
-    filepath = os.path.join(REPORTS_DIR, report['filename'])
-    if not os.path.exists(filepath):
+    # Relatórios registrados antes da gravação do hash são enviados sem ETag
+    etag = report.get('sha256')
+    if etag and request.if_none_match.contains(etag):
+        # O cliente já tem o arquivo: responde sem acessar o armazenamento
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    
+    # O arquivo é enviado em blocos, lido diretamente do armazenamento
+    report_key = get_report_key(report['filename'])
+    try:
+        report_file = storage.open(report_key)
+        size = report.get('size') or storage.size(report_key)
+    except FileNotFoundError:
         return jsonify({"error": "Arquivo de relatório não encontrado no servidor"}), 404
     
-    return send_file(
-        filepath, 
+    response = send_file(
+        report_file, 
         as_attachment=True,
         download_name=f"{report['download_name']}.docx",
-        mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+        mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        etag=etag or False,
+        conditional=False
     )
+    response.content_length = size
+    # Trata If-None-Match, If-Range e Range (206 com o intervalo solicitado)
+    return response.make_conditional(request, accept_ranges=True, complete_length=size)
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=8000)
\ No newline at end of file
+    create_app().run(debug=True, host='0.0.0.0', port=8000)
\ No newline at end of file
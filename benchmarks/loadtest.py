@@ -0,0 +1,184 @@
+"""
+Teste de carga do fluxo completo da API.
+
+Cada usuário virtual executa, em sequência:
+    1. POST /api/upload-cover-image
+    2. POST /api/generate-report (com sharepoint_id, buscando os dados no SharePoint ou no stub)
+    3. GET  /api/report-status/<task_id> até a conclusão
+    4. GET  /api/reports/<task_id>
+
+Uso (a partir da raiz do projeto, com a API e o stub do SharePoint em execução):
+    python -m benchmarks.loadtest --base-url http://localhost:8000 --concurrency 10 --iterations 5
+    python -m benchmarks.loadtest --duration 120 --concurrency 20 --headings 500 --output resultado.json
+"""
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import requests
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.stats import percentile  # noqa: E402
+from benchmarks.workloads import synthetic_cover, synthetic_outline  # noqa: E402
+
+DEFAULT_COVER = ROOT_DIR / "src" / "cover_images" / "cover_page_1.jpg"
+
+
+class Recorder:
+    """Acumula latências e erros por endpoint, de forma segura entre threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, endpoint: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def summary(self, elapsed: float) -> dict:
+        result = {}
+        with self._lock:
+            for endpoint, values in self.latencies.items():
+                result[endpoint] = {
+                    "requests": len(values),
+                    "errors": self.errors[endpoint],
+                    "error_rate": round(self.errors[endpoint] / len(values), 4),
+                    "p50_ms": round(statistics.median(values) * 1000, 1),
+                    "p95_ms": round(percentile(values, 95) * 1000, 1),
+                    "p99_ms": round(percentile(values, 99) * 1000, 1),
+                    "throughput_per_s": round(len(values) / elapsed, 2),
+                }
+        return result
+
+
+def timed(recorder: Recorder, endpoint: str, call):
+    start = time.perf_counter()
+    try:
+        response = call()
+    except requests.RequestException:
+        recorder.record(endpoint, time.perf_counter() - start, ok=False)
+        return None
+    recorder.record(endpoint, time.perf_counter() - start, ok=response.status_code < 400)
+    return response
+
+
+def run_flow(session: requests.Session, args, cover: bytes, seccoes: list, recorder: Recorder) -> None:
+    flow_start = time.perf_counter()
+
+    response = timed(recorder, "POST /api/upload-cover-image", lambda: session.post(
+        f"{args.base_url}/api/upload-cover-image", files={"file": ("capa.jpg", cover, "image/jpeg")},
+        timeout=args.timeout,
+    ))
+    if response is None or response.status_code != 201:
+        recorder.record("fluxo completo", time.perf_counter() - flow_start, ok=False)
+        return
+
+    payload = {
+        "report_params": {"seccoes": seccoes, "tipo_relatorio": "Preliminar"},
+        "nome_relatorio": "Relatório de teste de carga",
+        "cover_image_id": response.json()["image_id"],
+    }
+    if args.sharepoint_id is not None:
+        payload["sharepoint_id"] = args.sharepoint_id
+
+    response = timed(recorder, "POST /api/generate-report", lambda: session.post(
+        f"{args.base_url}/api/generate-report", json=payload, timeout=args.timeout,
+    ))
+    if response is None or response.status_code != 202:
+        recorder.record("fluxo completo", time.perf_counter() - flow_start, ok=False)
+        return
+    task_id = response.json()["task_id"]
+
+    status = None
+    deadline = time.monotonic() + args.report_timeout
+    while time.monotonic() < deadline:
+        response = timed(recorder, "GET /api/report-status/<task_id>", lambda: session.get(
+            f"{args.base_url}/api/report-status/{task_id}", timeout=args.timeout,
+        ))
+        status = response.json().get("status") if response is not None and response.ok else None
+        if status in ("completed", "error"):
+            break
+        time.sleep(args.poll_interval)
+
+    if status != "completed":
+        recorder.record("fluxo completo", time.perf_counter() - flow_start, ok=False)
+        return
+
+    response = timed(recorder, "GET /api/reports/<task_id>", lambda: session.get(
+        f"{args.base_url}/api/reports/{task_id}", timeout=args.timeout,
+    ))
+    recorder.record("fluxo completo", time.perf_counter() - flow_start, ok=response is not None and response.ok)
+
+
+def virtual_user(args, cover, seccoes, recorder, stop_at):
+    with requests.Session() as session:
+        iteration = 0
+        while (args.duration and time.monotonic() < stop_at) or (not args.duration and iteration < args.iterations):
+            run_flow(session, args, cover, seccoes, recorder)
+            iteration += 1
+
+
+def print_summary(summary: dict, elapsed: float) -> None:
+    print(f"Duração: {elapsed:.1f}s\n")
+    header = f"{'endpoint':<38}{'reqs':>7}{'erros':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, s in summary.items():
+        print(f"{endpoint:<38}{s['requests']:>7}{s['errors']:>7}{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}{s['throughput_per_s']:>9}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga do fluxo completo da API.")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=5, help="Usuários virtuais simultâneos")
+    parser.add_argument("--iterations", type=int, default=3, help="Fluxos por usuário (ignorado com --duration)")
+    parser.add_argument("--duration", type=float, help="Duração do teste em segundos")
+    parser.add_argument("--headings", type=int, default=50, help="Títulos nos elementos textuais")
+    parser.add_argument("--cover-size", type=int, help="Tamanho da capa sintética em bytes (padrão: capa de exemplo)")
+    parser.add_argument("--sharepoint-id", default="1", help="ID do item no SharePoint; use '' para não consultar")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="Intervalo entre consultas de status (s)")
+    parser.add_argument("--report-timeout", type=float, default=300, help="Tempo máximo de espera por relatório (s)")
+    parser.add_argument("--timeout", type=float, default=60, help="Timeout de cada requisição HTTP (s)")
+    parser.add_argument("--output", help="Grava o resumo em JSON neste arquivo")
+    args = parser.parse_args(argv)
+    args.base_url = args.base_url.rstrip("/")
+    args.sharepoint_id = args.sharepoint_id or None
+
+    cover = synthetic_cover(args.cover_size) if args.cover_size else DEFAULT_COVER.read_bytes()
+    seccoes = synthetic_outline(args.headings)
+    recorder = Recorder()
+
+    start = time.monotonic()
+    stop_at = start + (args.duration or 0)
+    threads = [
+        threading.Thread(target=virtual_user, args=(args, cover, seccoes, recorder, stop_at), daemon=True)
+        for _ in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    summary = recorder.summary(elapsed)
+    print_summary(summary, elapsed)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"duration_s": round(elapsed, 2), "endpoints": summary}, f, indent=4, ensure_ascii=False)
+
+    return 1 if any(s["errors"] for s in summary.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""
+Benchmarks do pipeline de geração de relatórios.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.run                      # executa e compara com benchmarks/baseline.json
+    python -m benchmarks.run --quick              # cargas menores, para verificação rápida
+    python -m benchmarks.run --stage format_data  # apenas as etapas informadas
+    python -m benchmarks.run --save-baseline      # grava os resultados como nova baseline
+
+Retorna código de saída 1 quando alguma etapa regride além da tolerância em relação à baseline.
+"""
+import argparse
+import copy
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+TEMPLATE_PATH = "src/templates/Relatório Padrão - GRAAU.docx"
+
+# Importações medidas em um processo Python novo (custo de inicialização de um worker da API);
+# "python" é a referência: apenas a inicialização do interpretador
+IMPORT_WORKLOADS = {
+    "python": "pass",
+    "app": "import app",
+    "src.report_generator": "import src.report_generator",
+    "src.sharepoint": "import src.sharepoint",
+}
+
+# Os módulos do projeto usam caminhos relativos à raiz (template e mapeamentos)
+os.chdir(ROOT_DIR)
+sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.stats import percentile  # noqa: E402
+from benchmarks.workloads import (  # noqa: E402
+    synthetic_cover, synthetic_outline, synthetic_report_params, synthetic_sharepoint_rows,
+)
+from src.report_generator import ReportGenerator  # noqa: E402
+from src.sharepoint import Sharepoint  # noqa: E402
+from src.utils import format_data, get_status_processo, load_json  # noqa: E402
+
+
+class Benchmark:
+    """Uma etapa do pipeline medida com uma carga específica."""
+
+    def __init__(self, stage, workload, run, prepare=None, iterations=20, track_memory=True):
+        self.stage = stage
+        self.workload = workload
+        self.run = run
+        # Preparação executada antes de cada iteração, fora da medição
+        self.prepare = prepare or (lambda: None)
+        self.iterations = iterations
+        # Desativado quando a execução ocorre em outro processo (fora do alcance do tracemalloc)
+        self.track_memory = track_memory
+
+    @property
+    def key(self):
+        return f"{self.stage}[{self.workload}]"
+
+
+def measure(benchmark: Benchmark) -> dict:
+    # Aquecimento (imports tardios, caches)
+    benchmark.run(benchmark.prepare())
+
+    durations = []
+    for _ in range(benchmark.iterations):
+        state = benchmark.prepare()
+        start = time.perf_counter()
+        benchmark.run(state)
+        durations.append(time.perf_counter() - start)
+
+    # Pico de memória em uma execução separada, para não distorcer os tempos
+    peak_memory_kb = None
+    if benchmark.track_memory:
+        state = benchmark.prepare()
+        tracemalloc.start()
+        benchmark.run(state)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_memory_kb = round(peak / 1024, 1)
+
+    return {
+        "iterations": benchmark.iterations,
+        "p50_ms": round(statistics.median(durations) * 1000, 3),
+        "p95_ms": round(percentile(durations, 95) * 1000, 3),
+        "p99_ms": round(percentile(durations, 99) * 1000, 3),
+        "throughput_per_s": round(len(durations) / sum(durations), 2),
+        "peak_memory_kb": peak_memory_kb,
+    }
+
+
+def run_python(code: str) -> None:
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, check=True)
+
+
+def build_benchmarks(work_dir: str, quick: bool = False) -> list:
+    generator = ReportGenerator(TEMPLATE_PATH)
+    outline_sizes = [10, 100, 500] if quick else [10, 100, 1000, 5000]
+    render_sizes = [10, 100] if quick else [10, 100, 1000]
+    cover_sizes = {"100KB": 100 * 1024, "1MB": 1024 * 1024} if quick else \
+        {"100KB": 100 * 1024, "1MB": 1024 * 1024, "5MB": 5 * 1024 * 1024}
+    row_counts = [1, 100] if quick else [1, 100, 1000]
+    iterations = 5 if quick else 20
+
+    benchmarks = []
+
+    for label, code in IMPORT_WORKLOADS.items():
+        benchmarks.append(Benchmark(
+            "import", label, run=lambda _, code=code: run_python(code),
+            iterations=iterations // 2, track_memory=False,
+        ))
+
+    for size in outline_sizes:
+        params = synthetic_report_params(size)
+        benchmarks.append(Benchmark(
+            "format_data", f"{size} headings",
+            run=format_data, prepare=lambda params=params: params, iterations=iterations * 5,
+        ))
+
+    benchmarks.append(Benchmark(
+        "get_status_processo", "preliminar",
+        run=lambda args: get_status_processo(*args),
+        prepare=lambda: ("Preliminar", "Contas-Tomada De Contas Especial"), iterations=iterations * 50,
+    ))
+
+    for size in render_sizes:
+        headings = synthetic_outline(size)[1]["data"]
+        benchmarks.append(Benchmark(
+            "generate_headings_from_structure", f"{size} headings",
+            run=lambda doc, headings=headings: generator.generate_headings_from_structure(doc.get_docx(), headings),
+            prepare=generator._load_template, iterations=iterations if size <= 100 else 5,
+        ))
+
+    for size in render_sizes:
+        context = format_data(synthetic_report_params(size))
+        output_path = os.path.join(work_dir, f"report_{size}.docx")
+        benchmarks.append(Benchmark(
+            "generate_report", f"{size} headings",
+            run=lambda ctx, output_path=output_path: generator.generate_report(ctx, output_path),
+            prepare=lambda context=context: copy.deepcopy(context), iterations=iterations if size <= 100 else 5,
+        ))
+
+    base_report = os.path.join(work_dir, "base_report.docx")
+    generator.generate_report(format_data(synthetic_report_params(10)), base_report)
+    for label, size in cover_sizes.items():
+        cover_path = os.path.join(work_dir, f"cover_{label}.jpg")
+        with open(cover_path, "wb") as f:
+            f.write(synthetic_cover(size))
+        target_path = os.path.join(work_dir, f"cover_target_{label}.docx")
+        benchmarks.append(Benchmark(
+            "replace_existing_image", f"cover {label}",
+            run=lambda _, target_path=target_path, cover_path=cover_path:
+                generator.replace_existing_image(target_path, "image1.png", cover_path),
+            prepare=lambda target_path=target_path: copy_file(base_report, target_path),
+            iterations=iterations,
+        ))
+
+    optimizer = ReportGenerator(TEMPLATE_PATH, optimize=True)
+    optimize_target = os.path.join(work_dir, "optimize_target.docx")
+    benchmarks.append(Benchmark(
+        "optimize_docx", "base report",
+        run=lambda _: optimizer.optimize_docx(optimize_target),
+        prepare=lambda: copy_file(base_report, optimize_target),
+        iterations=iterations,
+    ))
+
+    sharepoint = object.__new__(Sharepoint)  # Sem autenticação: apenas a transformação é medida
+    sharepoint.diretorias_mapping = load_json(Path("src/mappings/diretorias.json"))
+    sharepoint.divisoes_mapping = load_json(Path("src/mappings/divisoes.json"))
+    for count in row_counts:
+        rows = synthetic_sharepoint_rows(count)
+        benchmarks.append(Benchmark(
+            "Sharepoint._transform_data", f"{count} rows",
+            run=sharepoint._transform_data, prepare=lambda rows=rows: rows, iterations=iterations,
+        ))
+
+    return benchmarks
+
+
+def copy_file(source, target):
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        dst.write(src.read())
+
+
+def compare(results: dict, baseline: dict, tolerance: float, memory_tolerance: float) -> list:
+    regressions = []
+    for key, result in results.items():
+        reference = baseline.get(key)
+        if not reference:
+            continue
+        if result["p50_ms"] > reference["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{key}: p50 {result['p50_ms']}ms > baseline {reference['p50_ms']}ms (+{tolerance:.0%})")
+        if result["peak_memory_kb"] is None or reference["peak_memory_kb"] is None:
+            continue
+        if result["peak_memory_kb"] > reference["peak_memory_kb"] * (1 + memory_tolerance):
+            regressions.append(
+                f"{key}: memória {result['peak_memory_kb']}KB > baseline {reference['peak_memory_kb']}KB (+{memory_tolerance:.0%})"
+            )
+    return regressions
+
+
+def print_results(results: dict) -> None:
+    header = f"{'etapa':<58}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>10}{'pico KB':>12}"
+    print(header)
+    print("-" * len(header))
+    for key, r in results.items():
+        peak = "-" if r["peak_memory_kb"] is None else r["peak_memory_kb"]
+        print(f"{key:<58}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['throughput_per_s']:>10}{peak:>12}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks do pipeline de geração de relatórios.")
+    parser.add_argument("--stage", action="append", help="Executa apenas a(s) etapa(s) informada(s)")
+    parser.add_argument("--quick", action="store_true", help="Cargas menores e menos iterações")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="Arquivo de baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="Grava os resultados como baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Aumento máximo aceito no p50 (padrão: 0.5 = 50%%)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25, help="Aumento máximo aceito no pico de memória")
+    parser.add_argument("--output", help="Grava os resultados em JSON neste arquivo")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for benchmark in build_benchmarks(work_dir, quick=args.quick):
+            if args.stage and benchmark.stage not in args.stage:
+                continue
+            results[benchmark.key] = measure(benchmark)
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4, ensure_ascii=False)
+
+    if args.save_baseline:
+        baseline = load_json(args.baseline) if os.path.exists(args.baseline) else {}
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=4, ensure_ascii=False)
+        print(f"\nBaseline gravada em {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("\nBaseline não encontrada; nenhuma comparação realizada.")
+        return 0
+
+    regressions = compare(results, load_json(args.baseline), args.tolerance, args.memory_tolerance)
+    if regressions:
+        print("\nRegressões encontradas:")
+        for regression in regressions:
+            print(f"- {regression}")
+        return 1
+
+    print("\nNenhuma regressão em relação à baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""
+Stub local da API SOAP do SharePoint usada pelo shareplum, para testes de carga.
+
+Responde às chamadas feitas por `Sharepoint` (GetSite, GetList, GetViewCollection e
+GetListItems) com linhas gravadas ou sintéticas da lista "Cadastro de Ação de Controle",
+aplicando uma latência sorteada a cada requisição.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.sharepoint_stub --port 8081
+    python -m benchmarks.sharepoint_stub --rows linhas.json --latency-samples latencias.json
+
+A API deve ser iniciada apontando para o stub:
+    SHAREPOINT_SITE_URL=http://localhost:8081/sites/SecretariadeControleExterno SHAREPOINT_AUTH=none python app.py
+"""
+import argparse
+import datetime
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from xml.sax.saxutils import quoteattr, escape
+
+from lxml import etree
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.workloads import synthetic_sharepoint_rows  # noqa: E402
+
+LIST_NAME = "Cadastro de Ação de Controle"
+
+# Tipos das colunas conforme o schema da lista (as demais são texto)
+FIELD_TYPES = {
+    "ID": "Counter",
+    "Criado": "DateTime",
+    "Modificado": "DateTime",
+    "Data de conclusão do Relatório Preliminar": "DateTime",
+    "Data de conclusão da Ação de Controle": "DateTime",
+    "Data de Início da Ação:": "DateTime",
+    "Volume de Recursos Fiscalizados (VRF):": "Currency",
+    "Equipe de Fiscalização": "UserMulti",
+}
+
+SOAP_ENVELOPE = (
+    '<?xml version="1.0" encoding="utf-8"?>'
+    '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"><soap:Body>{body}</soap:Body></soap:Envelope>'
+)
+SOAP_NS = "http://schemas.microsoft.com/sharepoint/soap/"
+
+
+def to_sharepoint_value(value):
+    """Converte um valor Python para o formato textual retornado pelo SharePoint."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, list):
+        return ";#".join(value)
+    return str(value)
+
+
+class SharepointStub:
+    """Estado do stub: schema da lista, linhas e distribuição de latência."""
+
+    def __init__(self, rows: list, latency_median_ms: float, latency_sigma: float, latency_samples=None, seed=0):
+        self.rows = rows
+        self.latency_median_ms = latency_median_ms
+        self.latency_sigma = latency_sigma
+        self.latency_samples = latency_samples
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+        display_names = ["Título"] + sorted({key for row in rows for key in row})
+        self.fields = []
+        for i, display_name in enumerate(display_names):
+            if display_name == "Título":
+                name = "Title"
+            elif display_name == "ID":
+                name = "ID"
+            else:
+                name = f"Campo{i}"
+            self.fields.append({"Name": name, "DisplayName": display_name, "Type": FIELD_TYPES.get(display_name, "Text")})
+        self.internal_names = {f["DisplayName"]: f["Name"] for f in self.fields}
+
+    def sample_latency(self) -> float:
+        """Sorteia a latência (em segundos) de uma requisição."""
+        with self._rng_lock:
+            if self.latency_samples:
+                return self._rng.choice(self.latency_samples) / 1000
+            return self._rng.lognormvariate(0, self.latency_sigma) * self.latency_median_ms / 1000
+
+    def get_site(self, request):
+        return f'<GetSiteResponse xmlns="{SOAP_NS}"><GetSiteResult>{escape("<Site />")}</GetSiteResult></GetSiteResponse>'
+
+    def get_list(self, request):
+        fields = "".join(
+            f"<Field Name={quoteattr(f['Name'])} DisplayName={quoteattr(f['DisplayName'])} Type={quoteattr(f['Type'])} />"
+            for f in self.fields
+        )
+        return (
+            f'<GetListResponse xmlns="{SOAP_NS}"><GetListResult>'
+            f'<List Title={quoteattr(LIST_NAME)}><Fields>{fields}</Fields>'
+            '<RegionalSettings><Language>1046</Language><Locale>1046</Locale></RegionalSettings>'
+            '<ServerSettings><ServerVersion>16.0.0.0</ServerVersion></ServerSettings>'
+            '</List></GetListResult></GetListResponse>'
+        )
+
+    def get_view_collection(self, request):
+        return (
+            f'<GetViewCollectionResponse xmlns="{SOAP_NS}"><GetViewCollectionResult><Views>'
+            '<View Name="{00000000-0000-0000-0000-000000000000}" DisplayName="Todos os Itens" DefaultView="TRUE" />'
+            '</Views></GetViewCollectionResult></GetViewCollectionResponse>'
+        )
+
+    def get_list_items(self, request):
+        list_name = request.findtext(".//{*}listName")
+
+        if list_name == "UserInfo":
+            rows = [{"ID": str(i), "ImnName": f"Auditor {i}"} for i in range(10)]
+            attributes = [{f"ows_{k}": v for k, v in row.items()} for row in rows]
+        else:
+            # Filtro por ID (única consulta usada por Sharepoint.get_acao_controle_data)
+            item_id = None
+            for condition in request.xpath("//*[local-name()='Eq']"):
+                if condition.xpath("*[local-name()='FieldRef']/@Name") == ["ID"]:
+                    item_id = "".join(condition.xpath("*[local-name()='Value']/text()")).strip()
+
+            rows = [row for row in self.rows if item_id is None or str(row.get("ID")) == item_id]
+            attributes = []
+            for row in rows:
+                row_attributes = {}
+                for key, value in row.items():
+                    value = to_sharepoint_value(value)
+                    if value is not None:
+                        row_attributes[f"ows_{self.internal_names[key]}"] = value
+                attributes.append(row_attributes)
+
+        z_rows = "".join(
+            "<z:row " + " ".join(f"{k}={quoteattr(v)}" for k, v in row.items()) + " />" for row in attributes
+        )
+        return (
+            f'<GetListItemsResponse xmlns="{SOAP_NS}"><GetListItemsResult>'
+            '<listitems xmlns:rs="urn:schemas-microsoft-com:rowset" xmlns:z="#RowsetSchema">'
+            f'<rs:data ItemCount="{len(attributes)}">{z_rows}</rs:data>'
+            '</listitems></GetListItemsResult></GetListItemsResponse>'
+        )
+
+    def handle(self, soap_action: str, body: bytes) -> str:
+        actions = {
+            "GetSite": self.get_site,
+            "GetList": self.get_list,
+            "GetViewCollection": self.get_view_collection,
+            "GetListItems": self.get_list_items,
+        }
+        action = soap_action.strip('"').rsplit("/", 1)[-1]
+        if action not in actions:
+            raise KeyError(action)
+        request = etree.fromstring(body)
+        return SOAP_ENVELOPE.format(body=actions[action](request))
+
+
+def make_handler(stub: SharepointStub):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(stub.sample_latency())
+            try:
+                response = stub.handle(self.headers.get("SOAPAction", ""), body).encode("utf-8")
+                status = 200
+            except KeyError as e:
+                response = f"Ação SOAP não suportada pelo stub: {e}".encode("utf-8")
+                status = 501
+
+            self.send_response(status)
+            self.send_header("Content-Type", "text/xml; charset=utf-8")
+            self.send_header("Content-Length", str(len(response)))
+            self.end_headers()
+            self.wfile.write(response)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def load_rows(path):
+    """Carrega linhas gravadas (lista de objetos com os nomes de exibição das colunas)."""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stub local da API SOAP do SharePoint.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--rows", help="JSON com linhas gravadas da lista (padrão: linhas sintéticas)")
+    parser.add_argument("--row-count", type=int, default=100, help="Quantidade de linhas sintéticas")
+    parser.add_argument("--latency-median-ms", type=float, default=250, help="Mediana da latência log-normal")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Dispersão da latência log-normal")
+    parser.add_argument("--latency-samples", help="JSON com latências gravadas (ms), reproduzidas por amostragem")
+    args = parser.parse_args(argv)
+
+    rows = load_rows(args.rows) if args.rows else synthetic_sharepoint_rows(args.row_count)
+    samples = load_rows(args.latency_samples) if args.latency_samples else None
+    stub = SharepointStub(rows, args.latency_median_ms, args.latency_sigma, samples)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(stub))
+    print(f"Stub do SharePoint em http://{args.host}:{args.port} ({len(rows)} linhas)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
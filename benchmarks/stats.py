@@ -0,0 +1,7 @@
+"""Estatísticas compartilhadas pelos benchmarks e pelo teste de carga (sem dependências do projeto)."""
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
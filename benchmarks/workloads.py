@@ -0,0 +1,126 @@
+"""Geradores de cargas sintéticas para os benchmarks do pipeline de relatórios."""
+import datetime
+import json
+import random
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+EXAMPLE_SECTIONS = ROOT_DIR / "examples" / "sections.json"
+
+# Divisões existentes em src/mappings/divisoes.json, no formato "DIRETORIA/DIVISAO"
+DIVISOES = [
+    "DFCONTAS/DFCONTAS1", "DFCONTRATOS/DFCONTRATOS3", "DFPP/DFPP2",
+    "DFPESSOAL/DFPESSOAL2", "DFINFRA/DFINFRA1",
+]
+
+PROCESSO_TIPOS = [
+    "1;#CONTAS-TOMADA DE CONTAS ESPECIAL", "2;#AUDITORIA-OPERACIONAL", "3;#LEVANTAMENTO",
+    "4;#MONITORAMENTO", "5;#DENÚNCIA", "6;#REPRESENTAÇÃO",
+]
+
+
+def synthetic_outline(heading_count: int, seed: int = 0, max_depth: int = 4) -> list:
+    """
+    Gera `seccoes` no formato do frontend (ver examples/sections.json) com aproximadamente
+    `heading_count` títulos nos elementos textuais.
+    O último título de nível 1 é "Conclusão", para que a área de assinaturas seja inserida.
+    """
+    rng = random.Random(seed)
+    with open(EXAMPLE_SECTIONS, encoding="utf-8") as f:
+        pre_textual, _, post_textual = json.load(f)
+
+    textual = []
+    # Pilha de (lista de destino, nível)
+    stack = [(textual, 1)]
+    created = 0
+    while created < max(heading_count - 1, 0):
+        target, level = stack[-1]
+        node = {"title": f"Título {level}.{created}", "subtitles": []}
+        target.append(node)
+        created += 1
+
+        roll = rng.random()
+        if level < max_depth and roll < 0.45:
+            stack.append((node["subtitles"], level + 1))
+        elif len(stack) > 1 and roll > 0.75:
+            stack.pop()
+
+    textual.append({"title": "Conclusão", "subtitles": []})
+
+    return [pre_textual, {"title": "Elementos textuais", "data": textual}, post_textual]
+
+
+def synthetic_report_params(heading_count: int, seed: int = 0) -> dict:
+    """Gera `report_params` como enviados pelo frontend, com dados no formato já transformado do SharePoint."""
+    rng = random.Random(seed)
+    divisao = rng.choice(DIVISOES)
+    return {
+        "divisao_origem_ajustada": divisao,
+        "equipe_fiscalizacao": [f"Auditor {i}" for i in range(rng.randint(2, 6))],
+        "exercicios": [str(2020 + i) for i in range(rng.randint(1, 4))],
+        "n_processo_eTCE": f"TC/{rng.randint(1000, 99999):06d}/2025",
+        "processo_tipo": rng.choice(PROCESSO_TIPOS).split(";#")[1].title(),
+        "procurador": "Fulano de Tal",
+        "relator": "Sicrano da Silva",
+        "subclasse": "DENÚNCIA",
+        "unidades_fiscalizadas": [f"P. M. DE CIDADE {i}" for i in range(rng.randint(1, 5))],
+        "VRF": "R$ 1.234.567,89",
+        "seccoes": synthetic_outline(heading_count, seed),
+        "tipo_relatorio": rng.choice(["Preliminar", "Instrução"]),
+    }
+
+
+def synthetic_cover(size_bytes: int, seed: int = 0) -> bytes:
+    """Gera o conteúdo de uma imagem de capa com o tamanho informado (bytes aleatórios, incompressíveis como um JPEG)."""
+    rng = random.Random(seed)
+    header = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00"
+    return header + rng.randbytes(max(size_bytes - len(header), 0))
+
+
+def synthetic_sharepoint_rows(row_count: int, seed: int = 0) -> list:
+    """Gera linhas como retornadas pelo shareplum para a lista 'Cadastro de Ação de Controle'."""
+    rng = random.Random(seed)
+    base_date = datetime.datetime(2025, 1, 1)
+    rows = []
+    for i in range(row_count):
+        rows.append({
+            "Ação de controle ativa?": rng.choice(["Sim", "Não"]),
+            "Ações de controle PAI: Objeto ": f"Objeto da ação {i}",
+            "Anexos": str(rng.randint(0, 10)),
+            "Benefícios efetivos:": "",
+            "Benefícios Qualitativos": ";#Melhoria de controles;#Transparência;#",
+            "Nº Processo: Classe": f"{i};#PROCESSO DE CONTROLE EXTERNO",
+            "Criado": base_date + datetime.timedelta(days=rng.randint(0, 365)),
+            "Data de conclusão do Relatório Preliminar": base_date + datetime.timedelta(days=rng.randint(0, 365)),
+            "Data de conclusão da Ação de Controle": None,
+            "Data de Início da Ação:": base_date,
+            "Dias em atividade": f"{i};#{rng.randint(1, 400)}.0",
+            "Divisão de Origem Ajustada": rng.choice(DIVISOES),
+            "Equipe de Fiscalização": [f"{j};#Auditor {j}" for j in range(rng.randint(1, 6))],
+            "Exercícios": ";#".join(f"{j};#{2020 + j}" for j in range(rng.randint(1, 4))),
+            "Finalidade da ação de controle": "Verificar a regularidade",
+            "ID": str(i),
+            "Informe a metodologia do VRF:": "",
+            "Linha de Atuação: Descrição Tema": f"{i};#Saúde;#{i + 1};#Educação",
+            "Modificado": base_date + datetime.timedelta(days=rng.randint(0, 365)),
+            "Modificado por": "Fulano",
+            "Motivo do Encerramento da ação": "",
+            "Municípios visitados in loco": f"{i};#Teresina;#{i + 1};#Parnaíba",
+            "Nº Processo e-TCE": f"{i};#TC/{rng.randint(1000, 99999):06d}/2025",
+            "Nº Processo e-TCE: processoTipo": rng.choice(PROCESSO_TIPOS),
+            "Nº Processo: procurador": f"{i};#FULANO DE TAL",
+            "Proposta de benefícios potenciais ": "",
+            "Quantidade de medidas cautelares solicitadas;": "0",
+            "Nº Processo: relator": f"{i};#SICRANO DA SILVA",
+            "Situação da Ação de Controle": f"{i};#Em andamento",
+            "Nº Processo: Subclasse": f"{i};#DENÚNCIA",
+            "Técnicas Aplicadas": ";#Entrevista;#Análise documental;#",
+            "Tema(s) do PACEX": f"{i};#Saúde",
+            "Tempestividade da Ação de Controle": "No prazo",
+            "Tipo de ação": "Auditoria",
+            "Trimestre de conclusão": "2",
+            "Unidades Fiscalizadas": f"{i};#P. M. DE TERESINA;#{i + 1};#P. M. DE PARNAÍBA",
+            "Utilizou matriz de Risco da NUGEI?": "Não",
+            "Volume de Recursos Fiscalizados (VRF):": round(rng.uniform(1e3, 1e8), 2),
+        })
+    return rows
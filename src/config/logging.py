@@ -1,24 +1,142 @@
+import atexit
+import copy
+import datetime
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import threading
 
-def get_logger():
-    logger = logging.getLogger("api_logger")
-    logger.setLevel(logging.DEBUG)
+try:
+    from ..tracing import TraceContextFilter
+except ImportError:
+    from tracing import TraceContextFilter
+
+# Configuração por variáveis de ambiente
+LOG_FILE = os.getenv("LOG_FILE", "api.log")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # "text" ou "json" (uma linha JSON por registro)
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))  # Rotação por tamanho
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 5))
+LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN")  # Rotação por tempo (ex.: "midnight", "H"), no lugar da por tamanho
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")  # Níveis por módulo, ex.: "api_logger=INFO,src.report_generator=WARNING"
+
+# Níveis padrão; módulos sem nível definido herdam o do logger raiz (WARNING)
+DEFAULT_LEVELS = {"api_logger": "DEBUG", "src": "INFO"}
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(lineno)d - %(levelname)s - %(trace_id)s - %(message)s'
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formata cada registro como um objeto JSON em uma única linha."""
+
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "line": record.lineno,
+            "thread": record.threadName,
+            "trace_id": getattr(record, "trace_id", "-"),
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que mantém a exceção separada da mensagem.
+
+    O `prepare` padrão formata o registro inteiro (mensagem e traceback) antes de enfileirá-lo,
+    o que impede o JsonFormatter do listener de preencher o campo "exception".
+    Aqui apenas a mensagem é resolvida; o traceback segue em `exc_text` (texto, sem referências aos frames).
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
 
-    # Console Handler (DEBUG+)
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.DEBUG)
 
-    # File Handler (INFO+)
-    file_handler = logging.FileHandler("api.log")
-    file_handler.setLevel(logging.INFO)
+def parse_levels(spec: str) -> dict:
+    """Converte "modulo=NIVEL,outro=NIVEL" em {modulo: NIVEL}, ignorando entradas inválidas."""
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        level = level.strip().upper()
+        if name.strip() and isinstance(logging.getLevelName(level), int):
+            levels[name.strip()] = level
+    return levels
 
-    # Formato
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(lineno)d - %(levelname)s - %(message)s')
-    console_handler.setFormatter(formatter)
-    file_handler.setFormatter(formatter)
 
-    # Adiciona os handlers
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+def _create_file_handler() -> logging.Handler:
+    if LOG_ROTATE_WHEN:
+        return logging.handlers.TimedRotatingFileHandler(
+            LOG_FILE, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+    return logging.handlers.RotatingFileHandler(
+        LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+    )
 
-    return logger
+
+def setup_logging() -> None:
+    """
+    Instala o logging da aplicação uma única vez por processo.
+
+    Os registros são apenas enfileirados pelas threads da API e das tarefas (QueueHandler);
+    uma thread em segundo plano (QueueListener) formata e grava no console e no arquivo rotativo.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        formatter = JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+
+        # Console Handler (DEBUG+)
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.DEBUG)
+        console_handler.setFormatter(formatter)
+
+        # File Handler (INFO+), com rotação
+        file_handler = _create_file_handler()
+        file_handler.setLevel(logging.INFO)
+        file_handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = StructuredQueueHandler(log_queue)
+        # O trace_id depende do contexto da thread que registra, por isso é obtido antes de enfileirar
+        queue_handler.addFilter(TraceContextFilter())
+
+        root = logging.getLogger()
+        root.addHandler(queue_handler)
+
+        for name, level in {**DEFAULT_LEVELS, **parse_levels(LOG_LEVELS)}.items():
+            logging.getLogger(name).setLevel(level)
+
+        _listener = logging.handlers.QueueListener(
+            log_queue, console_handler, file_handler, respect_handler_level=True
+        )
+        _listener.start()
+        # Grava os registros pendentes ao encerrar o processo
+        atexit.register(_listener.stop)
+
+
+def get_logger():
+    setup_logging()
+    return logging.getLogger("api_logger")
@@ -0,0 +1,150 @@
+from collections import namedtuple
+from pathlib import Path
+import json
+import logging
+import re
+import threading
+
+# Diretório dos mapeamentos (diretorias.json, divisoes.json, status_processo.json)
+MAPPINGS_DIR = Path(__file__).resolve().parent / "mappings"
+# Chave da opção usada quando nenhuma regra de tipo de processo corresponde
+DEFAULT_KEY = "default"
+# Intervalo entre as verificações de alteração dos arquivos
+RELOAD_INTERVAL_SECONDS = 5
+
+logger = logging.getLogger(__name__)
+
+# Estado imutável dos mapeamentos: substituído por inteiro a cada recarga
+_Snapshot = namedtuple("_Snapshot", ["mtimes", "mappings", "status_matchers"])
+
+
+class StatusMatcher:
+    """
+    Regras de status de um tipo de relatório, compiladas em uma única expressão regular.
+
+    Cada opção de tipo de processo vira um lookahead de uma alternância; as alternativas são testadas
+    na ordem do arquivo, e o grupo que casou (`lastindex`) identifica a primeira opção contida no texto.
+    """
+
+    def __init__(self, rules: dict):
+        options = [option for option in rules if option != DEFAULT_KEY]
+        self.statuses = [rules[option] for option in options]
+        self.default = rules.get(DEFAULT_KEY, "")
+        self.pattern = None
+        if options:
+            self.pattern = re.compile(
+                "|".join(f"(?=.*?({re.escape(option)}))" for option in options), re.DOTALL
+            )
+
+    def match(self, processo_tipo: str) -> str:
+        if self.pattern is not None:
+            match = self.pattern.match(processo_tipo.lower())
+            if match:
+                return self.statuses[match.lastindex - 1]
+        return self.default
+
+
+class MappingRegistry:
+    """
+    Mapeamentos de `src/mappings` carregados uma única vez e mantidos em memória.
+    Um watcher em segundo plano recarrega todos os arquivos quando algum deles muda (mtime),
+    trocando o estado de uma só vez: as consultas nunca veem uma recarga pela metade.
+    """
+
+    def __init__(self, directory=MAPPINGS_DIR):
+        self.directory = Path(directory)
+        self._snapshot = self._load(previous=None)
+        self._reload_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher = None
+
+    def _get_mtimes(self) -> dict:
+        # O tamanho complementa o mtime, para alterações feitas no mesmo instante
+        mtimes = {}
+        for path in sorted(self.directory.glob("*.json")):
+            stat = path.stat()
+            mtimes[path.stem] = (stat.st_mtime_ns, stat.st_size)
+        return mtimes
+
+    def _load(self, previous) -> _Snapshot:
+        mtimes = self._get_mtimes()
+        mappings = {}
+        for name in mtimes:
+            path = self.directory / f"{name}.json"
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    mappings[name] = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                if previous is None:
+                    logger.error(f"Erro ao carregar o mapeamento {path}: {str(e)}")
+                    mappings[name] = {}
+                else:
+                    # Mantém a versão anterior até o arquivo ser corrigido
+                    logger.error(f"Erro ao recarregar o mapeamento {path}, versão anterior mantida: {str(e)}")
+                    mappings[name] = previous.mappings.get(name, {})
+
+        status_matchers = {
+            tipo_relatorio: StatusMatcher(rules)
+            for tipo_relatorio, rules in mappings.get("status_processo", {}).items()
+        }
+        return _Snapshot(mtimes, mappings, status_matchers)
+
+    def reload_if_changed(self) -> bool:
+        """
+        Recarrega os mapeamentos se algum arquivo foi criado, alterado ou removido.
+
+        Returns:
+            bool: True se houve recarga.
+        """
+        with self._reload_lock:
+            if self._get_mtimes() == self._snapshot.mtimes:
+                return False
+            self._snapshot = self._load(previous=self._snapshot)
+        logger.info(f"Mapeamentos recarregados de {self.directory}")
+        return True
+
+    def start_watcher(self, interval: float = RELOAD_INTERVAL_SECONDS) -> None:
+        """Inicia a verificação periódica dos arquivos em uma thread em segundo plano."""
+        if self._watcher is not None:
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name="mapping-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        if self._watcher is not None:
+            self._stop_event.set()
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop_event.wait(interval):
+            try:
+                self.reload_if_changed()
+            except OSError as e:
+                logger.error(f"Erro ao verificar os mapeamentos: {str(e)}")
+
+    def get(self, name: str) -> dict:
+        """Retorna um mapeamento pelo nome do arquivo, sem extensão (ex.: "diretorias")."""
+        return self._snapshot.mappings.get(name, {})
+
+    def get_status_processo(self, tipo_relatorio: str, processo_tipo: str) -> str:
+        """Retorna o status do processo para o tipo de relatório e o tipo de processo informados."""
+        matcher = self._snapshot.status_matchers.get(tipo_relatorio.lower())
+        if matcher is None:
+            return ""
+        return matcher.match(processo_tipo)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> MappingRegistry:
+    """Retorna o registro de mapeamentos do processo, carregando os arquivos na primeira chamada."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MappingRegistry()
+    return _registry
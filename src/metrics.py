@@ -0,0 +1,210 @@
+from contextlib import contextmanager
+import bisect
+import threading
+import time
+
+# Limites (em segundos) dos buckets dos histogramas de duração
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """Conjunto de métricas expostas no formato texto do Prometheus."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrica já registrada: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def render(self) -> str:
+        """Gera o conteúdo do endpoint /metrics (formato de exposição 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name: str, documentation: str, labelnames=(), registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _label_values(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Labels de {self.name} devem ser {self.labelnames}, recebido {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(_Metric):
+    """Contador monotônico."""
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._label_values(labels), 0)
+
+    def samples(self) -> list:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(_Metric):
+    """
+    Valor instantâneo, calculado no momento da coleta pela função `fn`.
+    Sem labels, `fn` retorna um número; com labels, um dicionário {tupla de valores dos labels: número}.
+    """
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, fn, labelnames=(), registry: Registry = REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.fn = fn
+
+    def samples(self) -> list:
+        value = self.fn()
+        values = value.items() if self.labelnames else [((), value)]
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in values]
+
+
+class Histogram(_Metric):
+    """Histograma de durações (ou outros valores) com buckets cumulativos."""
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS,
+                 registry: Registry = REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+        # Por combinação de labels: [contagem por bucket (+Inf no final), soma, contagem]
+        self._values = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._label_values(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Mede a duração do bloco, registrando-a inclusive quando ele lança exceção."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> list:
+        with self._lock:
+            values = [(key, list(state[0]), state[1], state[2]) for key, state in self._values.items()]
+        lines = []
+        for key, bucket_counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+# Métricas compartilhadas pelos módulos da aplicação
+REPORT_STAGE_SECONDS = Histogram(
+    "graau_report_stage_seconds",
+    "Duração de cada etapa da geração de relatórios, em segundos.",
+    ["stage"],
+)
+REPORT_JOB_SECONDS = Histogram(
+    "graau_report_job_seconds",
+    "Duração total das tarefas de geração de relatórios (sem a espera na fila), em segundos.",
+    ["result"],
+)
+SHAREPOINT_STAGE_SECONDS = Histogram(
+    "graau_sharepoint_stage_seconds",
+    "Duração de cada etapa das consultas ao SharePoint, em segundos.",
+    ["stage"],
+)
+REPORT_JOB_ESTIMATED_MEMORY_BYTES = Histogram(
+    "graau_report_job_estimated_memory_bytes",
+    "Memória estimada das tarefas de geração admitidas no orçamento, em bytes.",
+    buckets=tuple(mb * 1024 * 1024 for mb in (10, 16, 32, 64, 128, 256, 512, 1024)),
+)
+CACHE_REQUESTS = Counter(
+    "graau_cache_requests_total",
+    "Consultas aos caches internos, por resultado (hit ou miss).",
+    ["cache", "result"],
+)
+DOCX_OPTIMIZER_SAVED_BYTES = Counter(
+    "graau_docx_optimizer_saved_bytes_total",
+    "Bytes economizados pela otimização dos DOCX gerados.",
+)
+
+
+def cache_hit_ratios() -> dict:
+    """Retorna a taxa de acerto de cada cache a partir de CACHE_REQUESTS."""
+    with CACHE_REQUESTS._lock:
+        values = list(CACHE_REQUESTS._values.items())
+    totals = {}
+    for (cache, result), value in values:
+        hits, count = totals.get(cache, (0, 0))
+        totals[cache] = (hits + (value if result == "hit" else 0), count + value)
+    return {(cache,): hits / count for cache, (hits, count) in totals.items() if count}
+
+
+CACHE_HIT_RATIO = Gauge(
+    "graau_cache_hit_ratio",
+    "Taxa de acerto dos caches internos desde o início do processo.",
+    cache_hit_ratios,
+    ["cache"],
+)
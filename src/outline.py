@@ -0,0 +1,77 @@
+# Estrutura de títulos dos relatórios, calculada a partir das seções do contexto sem carregar o template.
+# Não depende da pilha DOCX: é usada pela pré-visualização, inclusive nos processos do papel `api`.
+
+
+def get_textual_elements(context: dict) -> list:
+    """
+    Extrai os elementos textuais (segunda seção) de `seccoes` do contexto.
+
+    Args:
+        context: Dicionário com o contexto do template.
+
+    Returns:
+        list: Títulos e subtítulos dos elementos textuais.
+    """
+    seccoes = context.get("seccoes", [])
+    if len(seccoes) != 3:
+        raise ValueError(f"'seccoes' must have exactly 3 sections, got {len(seccoes)}")
+
+    _, textual_elements, _ = [elem.get("data", []) for elem in seccoes]
+    return textual_elements
+
+
+def get_signing_area_name(headings: list) -> str:
+    """
+    Determina qual seção deve conter a área de assinaturas.
+
+    Args:
+        headings: Lista de dicionários com os títulos e subtítulos.
+
+    Returns:
+        str: "proposta de encaminhamentos" ou "conclusão", ou None se nenhuma delas existir.
+    """
+    list_headings_level_1 = [h["title"].lower() for h in headings]
+
+    if "proposta de encaminhamentos" in list_headings_level_1:
+        return "proposta de encaminhamentos"
+    elif "conclusão" in list_headings_level_1:
+        return "conclusão"
+
+    return None
+
+
+def build_outline(headings: list) -> list:
+    """
+    Monta a estrutura de títulos que `ReportGenerator.generate_headings_from_structure` produz no documento.
+
+    Args:
+        headings: Lista de dicionários com os títulos e subtítulos.
+
+    Returns:
+        list: Entradas na ordem do documento. Títulos têm nível, numeração e estilo;
+        a área de assinaturas, quando existir, é a última entrada.
+    """
+    outline = []
+
+    def walk(items, level, prefix):
+        for n, sec in enumerate(items, start=1):
+            number = f"{prefix}{n}."
+            outline.append({
+                "type": "heading",
+                "level": level,
+                "number": number,
+                "title": sec["title"],
+                "style": f"Heading {level}",
+                # O primeiro título substitui o marcador; os demais de nível 1 começam em nova página
+                "page_break": level == 1 and n > 1,
+            })
+            walk(sec.get("subtitles", []), level + 1, number)
+
+    walk(headings, 1, "")
+
+    assinaturas_area = get_signing_area_name(headings)
+    if assinaturas_area:
+        # A área de assinaturas é adicionada ao final do documento
+        outline.append({"type": "signing_block", "section": assinaturas_area})
+
+    return outline
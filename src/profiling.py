@@ -0,0 +1,95 @@
+import cProfile
+import contextvars
+import datetime
+import logging
+import threading
+import tracemalloc
+
+# Quantidade de linhas do relatório de alocações
+TOP_ALLOCATIONS = 50
+# Profundidade dos tracebacks registrados pelo tracemalloc
+TRACEBACK_FRAMES = 25
+
+# O tracemalloc é global ao processo (e, a partir do Python 3.12, o cProfile também):
+# apenas uma tarefa é perfilada por vez
+_profiling_lock = threading.Lock()
+
+# Resultado do perfil da tarefa em execução no contexto atual: None (perfil não solicitado),
+# True (tarefa perfilada) ou False (solicitado, mas outra tarefa já estava sendo perfilada)
+_profile_state = contextvars.ContextVar("profile_state", default=None)
+
+logger = logging.getLogger(__name__)
+
+
+def write_allocation_report(snapshot, peak_bytes: int, path: str, task_id: str) -> None:
+    """Grava as linhas de código que mais alocaram memória durante a tarefa."""
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ])
+    statistics = snapshot.statistics("traceback")
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"Tarefa: {task_id}\n")
+        f.write(f"Gerado em: {datetime.datetime.now().isoformat()}\n")
+        f.write(f"Pico de memória rastreada: {peak_bytes / 1024 / 1024:.1f} MB\n")
+        f.write(f"Memória ainda alocada ao final: {sum(stat.size for stat in statistics) / 1024 / 1024:.1f} MB\n")
+        f.write("Obs.: o tracemalloc é global; alocações de outras threads no período também são contabilizadas.\n")
+
+        for index, stat in enumerate(statistics[:TOP_ALLOCATIONS], 1):
+            f.write(f"\n#{index}: {stat.size / 1024:.1f} KB em {stat.count} blocos\n")
+            for line in stat.traceback.format(most_recent_first=True):
+                f.write(f"{line}\n")
+
+
+def run_profiled(task_id: str, cpu_path: str, allocations_path: str, fn, *args, **kwargs):
+    """
+    Executa `fn` sob o cProfile e o tracemalloc, gravando o perfil de CPU (formato pstats)
+    e o relatório de alocações nos caminhos informados.
+    Se outra tarefa já estiver sendo perfilada, `fn` é executada normalmente, sem perfil.
+    Durante a execução, `current_profile_state` informa se a tarefa está sendo perfilada.
+
+    Args:
+        task_id: ID da tarefa (incluído no relatório de alocações).
+        cpu_path: Arquivo de saída do perfil de CPU, legível com `pstats` ou `snakeviz`.
+        allocations_path: Arquivo de saída do relatório de alocações.
+        fn: Função a ser executada.
+
+    Returns:
+        O retorno de `fn`.
+    """
+    if not _profiling_lock.acquire(blocking=False):
+        logger.warning(f"Perfil da tarefa {task_id} não capturado: outra tarefa está sendo perfilada")
+        token = _profile_state.set(False)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _profile_state.reset(token)
+
+    token = _profile_state.set(True)
+    try:
+        started_tracemalloc = not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start(TRACEBACK_FRAMES)
+        tracemalloc.reset_peak()
+
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(fn, *args, **kwargs)
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            if started_tracemalloc:
+                tracemalloc.stop()
+
+            profiler.dump_stats(cpu_path)
+            write_allocation_report(snapshot, peak_bytes, allocations_path, task_id)
+            logger.info(f"Perfil da tarefa {task_id} gravado em {cpu_path} e {allocations_path}")
+    finally:
+        _profile_state.reset(token)
+        _profiling_lock.release()
+
+
+def current_profile_state():
+    """Retorna se a tarefa em execução está sendo perfilada (None quando o perfil não foi solicitado)."""
+    return _profile_state.get()
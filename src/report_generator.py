@@ -1,20 +1,108 @@
 from typing import Union, Optional
 from docx.shared import Pt, RGBColor
 from docx.enum.text import WD_BREAK, WD_ALIGN_PARAGRAPH
+from docx.opc.oxml import parse_xml, serialize_part_xml
 from docxtpl import DocxTemplate
+from jinja2 import Environment, meta
+from lxml import etree
 from pathlib import Path
+import hashlib
+import io
 import logging
+import posixpath
+import threading
 import zipfile
+import zlib
 import os
 import shutil
 import tempfile
 
+try:
+    from .metrics import CACHE_REQUESTS, DOCX_OPTIMIZER_SAVED_BYTES, REPORT_STAGE_SECONDS
+    from .outline import build_outline, get_signing_area_name, get_textual_elements
+    from .tracing import trace_stage
+except ImportError:
+    from metrics import CACHE_REQUESTS, DOCX_OPTIMIZER_SAVED_BYTES, REPORT_STAGE_SECONDS
+    from outline import build_outline, get_signing_area_name, get_textual_elements
+    from tracing import trace_stage
+
+# Variáveis inseridas no corpo do documento pela área de assinaturas (antes da renderização)
+SIGNING_VARIABLES = {"divisao_origem_ajustada_diretoria", "divisao_origem_ajustada_divisao"}
+
+DOCUMENT_PART = "word/document.xml"
+
+# Otimização dos DOCX gerados (ver ReportGenerator.optimize_docx)
+DEFAULT_COMPRESSION_LEVEL = 9
+# Mídias em formatos já compactados são armazenadas sem compressão, a menos que o deflate reduza ao menos esta fração
+COMPRESSED_MEDIA_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".wdp"}
+MIN_MEDIA_DEFLATE_GAIN = 0.02
+MEDIA_SAMPLE_BYTES = 64 * 1024
+MEDIA_PREFIX = "word/media/"
+CONTENT_TYPES_PART = "[Content_Types].xml"
+# Relacionamentos removidos quando não referenciados pela parte de origem (os demais, como estilos e
+# configurações, são referenciados pelo tipo, e não pelo ID)
+PRUNABLE_RELATIONSHIP_TYPES = {
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/image",
+    "http://schemas.microsoft.com/office/2007/relationships/hdphoto",
+}
+RELATIONSHIPS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CONTENT_TYPES_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+
 class ReportGenerator:
-    def __init__(self, template_path: str):
+    # Cache compartilhado do mapeamento parte -> variáveis, por template
+    _template_variables_cache = {}
+    _template_variables_lock = threading.Lock()
+    
+    # Cache compartilhado do conteúdo dos templates, evitando leitura de disco a cada relatório
+    _template_bytes_cache = {}
+    _template_bytes_lock = threading.Lock()
+
+    def __init__(self, template_path: str, optimize: bool = False, compression_level: int = DEFAULT_COMPRESSION_LEVEL):
+        """
+        Args:
+            template_path: Caminho do template DOCX.
+            optimize: Aplica a otimização de tamanho (`optimize_docx`) aos documentos gerados.
+            compression_level: Nível de compressão (0 a 9) das partes XML na otimização.
+        """
         self.template_path = template_path
+        self.optimize = optimize
+        self.compression_level = compression_level
         self.logger = logging.getLogger(__name__)
-        self.logger.setLevel(logging.INFO)
         
+    def _load_template(self) -> DocxTemplate:
+        """
+        Cria um DocxTemplate a partir do conteúdo do template mantido em memória.
+        O conteúdo é relido do disco apenas quando o arquivo muda.
+        
+        Returns:
+            DocxTemplate: Nova instância do template, pronta para receber títulos e ser renderizada.
+        """
+        cache_key = os.path.abspath(self.template_path)
+        mtime = os.path.getmtime(self.template_path)
+        
+        with trace_stage(REPORT_STAGE_SECONDS, "template_load"):
+            with self._template_bytes_lock:
+                cached = self._template_bytes_cache.get(cache_key)
+            
+            if not cached or cached[0] != mtime:
+                CACHE_REQUESTS.inc(cache="template_bytes", result="miss")
+                with open(self.template_path, 'rb') as f:
+                    cached = (mtime, f.read())
+                with self._template_bytes_lock:
+                    self._template_bytes_cache[cache_key] = cached
+            else:
+                CACHE_REQUESTS.inc(cache="template_bytes", result="hit")
+            
+            return DocxTemplate(io.BytesIO(cached[1]))
+
+    def warm_up(self) -> None:
+        """
+        Preenche os caches compartilhados do template (conteúdo e variáveis por parte), para que o
+        primeiro relatório do processo não pague a leitura e a análise do arquivo.
+        """
+        self._load_template()
+        self.get_template_variables()
+
     def _insert_headings_recursively(self, doc, headings: list, index: int, level: int=1):
         """
         Insere os títulos e subtítulos no documento de forma recursiva.
@@ -45,14 +133,11 @@ class ReportGenerator:
         return current_index
     
     def _get_signing_area_name(self, headings: list) -> str:
-        list_headings_level_1 = [h["title"].lower() for h in headings]
-        
-        if "proposta de encaminhamentos" in list_headings_level_1:
-            return "proposta de encaminhamentos"
-        elif "conclusão" in list_headings_level_1:
-            return "conclusão"
-        
-        return None
+        return get_signing_area_name(headings)
+    
+    def build_outline(self, headings: list) -> list:
+        """Monta a estrutura de títulos do documento, sem carregar o template (ver `outline.build_outline`)."""
+        return build_outline(headings)
     
     def _add_content(self, doc, text=None, bold=False, color=None, alignment=None, font='Segoe UI', space_after=0):
         p = doc.add_paragraph()
@@ -144,10 +229,182 @@ class ReportGenerator:
                 
                 break
             
+    def _rewrite_docx(self, source_path: Union[str, Path], output_path: Union[str, Path], replacements: dict,
+                      optimize: bool = False) -> int:
+        """
+        Copia o DOCX membro a membro, substituindo o conteúdo dos membros informados.
+        Os demais membros são copiados sem serem extraídos para disco.
+        
+        Args:
+            source_path: Caminho do DOCX de origem.
+            output_path: Caminho do DOCX resultante (pode ser igual à origem).
+            replacements: Dicionário {nome do membro no ZIP: bytes do novo conteúdo}.
+            optimize: Aplica a otimização de tamanho na mesma cópia (ver `optimize_docx`).
+            
+        Returns:
+            int: Bytes economizados pela otimização nos membros não substituídos (0 sem otimização).
+        """
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        fd, temp_path = tempfile.mkstemp(suffix=".docx", dir=output_dir)
+        os.close(fd)
+        saved_bytes = 0
+        
+        try:
+            with zipfile.ZipFile(source_path, 'r') as source, \
+                 zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED) as target:
+                removed = set()
+                optimized = {}
+                if optimize:
+                    optimized, removed = self._plan_optimization(source, replacements)
+                
+                for item in source.infolist():
+                    original_size = item.compress_size
+                    if item.filename in removed:
+                        saved_bytes += original_size
+                    elif optimize:
+                        if item.filename in replacements:
+                            data = replacements[item.filename]
+                        else:
+                            data = optimized.get(item.filename)
+                            if data is None:
+                                data = source.read(item)
+                        target.writestr(item, data, compress_type=self._get_compress_type(item.filename, data),
+                                        compresslevel=self.compression_level)
+                        if item.filename not in replacements:
+                            saved_bytes += original_size - item.compress_size
+                    elif item.filename in replacements:
+                        target.writestr(item, replacements[item.filename])
+                    else:
+                        with source.open(item) as src, target.open(item, 'w') as dst:
+                            shutil.copyfileobj(src, dst)
+            
+            # Substitui o arquivo de saída de forma atômica
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        
+        if optimize:
+            DOCX_OPTIMIZER_SAVED_BYTES.inc(max(saved_bytes, 0))
+            self.logger.info(f"DOCX optimized: {output_path} ({saved_bytes} bytes saved, parts removed: {sorted(removed)})")
+        return saved_bytes
+
+    def _get_compress_type(self, member_name: str, data: bytes) -> int:
+        """
+        Escolhe a compressão de um membro: XML e demais partes são compactados; mídias em formatos
+        já compactados são armazenadas sem compressão quando o deflate não traz ganho relevante.
+        """
+        if posixpath.splitext(member_name)[1].lower() not in COMPRESSED_MEDIA_EXTENSIONS or not data:
+            return zipfile.ZIP_DEFLATED
+        
+        # O ganho é estimado em uma amostra do início do arquivo, evitando compactar a mídia duas vezes
+        sample = data[:MEDIA_SAMPLE_BYTES]
+        compressor = zlib.compressobj(self.compression_level, zlib.DEFLATED, -15)
+        compressed_size = len(compressor.compress(sample)) + len(compressor.flush())
+        if compressed_size > len(sample) * (1 - MIN_MEDIA_DEFLATE_GAIN):
+            return zipfile.ZIP_STORED
+        return zipfile.ZIP_DEFLATED
+
+    def _plan_optimization(self, source: zipfile.ZipFile, replacements: dict) -> tuple:
+        """
+        Identifica as partes e relacionamentos desnecessários do DOCX:
+        - relacionamentos de imagem que a parte de origem não referencia;
+        - mídias duplicadas (mesmo conteúdo), passando os relacionamentos a apontar para uma única cópia;
+        - mídias sem nenhum relacionamento, arquivos .rels de partes inexistentes e as declarações
+          de tipo de conteúdo (Override) das partes removidas.
+        
+        Args:
+            source: DOCX de origem, aberto para leitura.
+            replacements: Membros cujo conteúdo será substituído (considerados no lugar do original).
+            
+        Returns:
+            tuple: ({membro: novo conteúdo}, {membros removidos})
+        """
+        members = set(source.namelist())
+        
+        def read(name):
+            return replacements[name] if name in replacements else source.read(name)
+        
+        # Mídias com conteúdo idêntico são consolidadas na primeira encontrada
+        canonical_media = {}
+        media_by_hash = {}
+        for name in sorted(name for name in members if name.startswith(MEDIA_PREFIX)):
+            digest = hashlib.sha256(read(name)).hexdigest()
+            canonical_media[name] = media_by_hash.setdefault(digest, name)
+        
+        updated = {}
+        referenced = set()
+        removed = set()
+        
+        for rels_name in sorted(name for name in members if name.endswith(".rels")):
+            # "word/_rels/document.xml.rels" descreve os relacionamentos de "word/document.xml"
+            rels_dir, rels_file = posixpath.split(rels_name)
+            part_dir = posixpath.dirname(rels_dir)
+            part_name = posixpath.join(part_dir, rels_file[:-len(".rels")])
+            if rels_dir != "_rels" and part_name not in members:
+                removed.add(rels_name)
+                continue
+            
+            # IDs usados pela parte de origem (qualquer valor de atributo, para não remover referências válidas)
+            used_ids = None
+            if part_name in members and part_name.endswith(".xml"):
+                part_root = etree.fromstring(read(part_name))
+                used_ids = {value for element in part_root.iter() for value in element.attrib.values()}
+            
+            rels_root = etree.fromstring(read(rels_name))
+            changed = False
+            for relationship in list(rels_root):
+                if relationship.get("TargetMode") == "External":
+                    continue
+                target = posixpath.normpath(posixpath.join(part_dir, relationship.get("Target", ""))).lstrip("/")
+                
+                if (used_ids is not None and relationship.get("Type") in PRUNABLE_RELATIONSHIP_TYPES
+                        and relationship.get("Id") not in used_ids):
+                    rels_root.remove(relationship)
+                    changed = True
+                    continue
+                
+                canonical = canonical_media.get(target, target)
+                if canonical != target:
+                    relationship.set("Target", posixpath.relpath(canonical, part_dir or "."))
+                    changed = True
+                referenced.add(canonical)
+            
+            if changed:
+                updated[rels_name] = etree.tostring(rels_root, xml_declaration=True, encoding="UTF-8", standalone=True)
+        
+        removed |= {name for name in members if name.startswith(MEDIA_PREFIX) and name not in referenced}
+        
+        # Remove as declarações de tipo de conteúdo das partes removidas
+        if removed and CONTENT_TYPES_PART in members:
+            types_root = etree.fromstring(read(CONTENT_TYPES_PART))
+            overrides = [element for element in types_root if element.tag == f"{{{CONTENT_TYPES_NS}}}Override"
+                         and element.get("PartName", "").lstrip("/") in removed]
+            if overrides:
+                for element in overrides:
+                    types_root.remove(element)
+                updated[CONTENT_TYPES_PART] = etree.tostring(types_root, xml_declaration=True, encoding="UTF-8", standalone=True)
+        
+        return updated, removed
+
+    def optimize_docx(self, docx_path: Union[str, Path]) -> int:
+        """
+        Reduz o tamanho de um DOCX gerado, sem alterar seu conteúdo visível: remove mídias e relacionamentos
+        não referenciados (e mídias duplicadas), armazena sem compressão as mídias já compactadas e
+        compacta as partes XML com o nível configurado (`compression_level`).
+        
+        Args:
+            docx_path: Caminho do DOCX (sobrescrito de forma atômica).
+            
+        Returns:
+            int: Bytes economizados.
+        """
+        with trace_stage(REPORT_STAGE_SECONDS, "optimize"):
+            return self._rewrite_docx(docx_path, docx_path, {}, optimize=True)
+
     def replace_existing_image(self, docx_path: str, target_image_filename: str, new_image_path: Union[str, Path]) -> bool:
         """
-        Replace an existing image in the DOCX file by modifying its underlying ZIP archive.
-        Utiliza um diretório temporário que é automaticamente removido.
+        Replace an existing image in the DOCX file by swapping its member in the underlying ZIP archive.
         
         Args:
             docx_path: Path to the DOCX file.
@@ -158,39 +415,194 @@ class ReportGenerator:
             bool: True if the image was replaced successfully.
         """
         try:
-            # Cria um diretório temporário que será automaticamente excluído
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # Extrai o conteúdo do DOCX para o diretório temporário
-                with zipfile.ZipFile(docx_path, 'r') as zip_ref:
-                    zip_ref.extractall(temp_dir)
+            with trace_stage(REPORT_STAGE_SECONDS, "image_replacement"):
+                target_member = f"word/media/{target_image_filename}"
                 
-                target_image_path = os.path.join(temp_dir, 'word', 'media', target_image_filename)
-                if not os.path.exists(target_image_path):
-                    raise FileNotFoundError(f"Target image '{target_image_filename}' not found in the DOCX file.")
-                
-                # Substitui a imagem antiga pela nova
-                shutil.copy(str(new_image_path), target_image_path)
+                with zipfile.ZipFile(docx_path, 'r') as zip_ref:
+                    if target_member not in zip_ref.namelist():
+                        raise FileNotFoundError(f"Target image '{target_image_filename}' not found in the DOCX file.")
                 
-                # Reempacota o DOCX com os conteúdos modificados (sobrescrevendo o arquivo original)
-                with zipfile.ZipFile(docx_path, 'w', zipfile.ZIP_DEFLATED) as new_docx:
-                    for foldername, _, filenames in os.walk(temp_dir):
-                        for filename in filenames:
-                            file_path = os.path.join(foldername, filename)
-                            arcname = os.path.relpath(file_path, temp_dir)
-                            new_docx.write(file_path, arcname)
+                with open(new_image_path, 'rb') as f:
+                    new_image = f.read()
                 
-                self.logger.info(f"Image replaced successfully in {docx_path}")
+                # Substitui apenas o membro da imagem, copiando os demais (sobrescrevendo o arquivo original)
+                # Com a otimização ativada, ela é aplicada nesta mesma cópia
+                self._rewrite_docx(docx_path, docx_path, {target_member: new_image}, optimize=self.optimize)
+            
+            self.logger.info(f"Image replaced successfully in {docx_path}")
             return True
 
         except Exception as e:
             self.logger.error(f"Error replacing image: {str(e)}")
             return False
 
+    def get_template_variables(self) -> dict:
+        """
+        Mapeia cada parte XML do template para as variáveis Jinja que ela utiliza.
+        O resultado é calculado uma única vez por template (e versão do arquivo).
+        
+        Returns:
+            dict: {nome do membro no ZIP: conjunto de variáveis}
+        """
+        cache_key = (os.path.abspath(self.template_path), os.path.getmtime(self.template_path))
+        
+        with self._template_variables_lock:
+            if cache_key in self._template_variables_cache:
+                CACHE_REQUESTS.inc(cache="template_variables", result="hit")
+                return self._template_variables_cache[cache_key]
+        
+        CACHE_REQUESTS.inc(cache="template_variables", result="miss")
+        doc = DocxTemplate(self.template_path)
+        env = Environment()
+        variables = {}
+        
+        with zipfile.ZipFile(self.template_path, 'r') as zip_ref:
+            for name in zip_ref.namelist():
+                if not name.endswith(".xml"):
+                    continue
+                xml = doc.patch_xml(zip_ref.read(name).decode("utf-8"))
+                part_variables = meta.find_undeclared_variables(env.parse(xml))
+                if part_variables:
+                    variables[name] = part_variables
+        
+        # A área de assinaturas e os títulos são inseridos no corpo do documento
+        variables.setdefault(DOCUMENT_PART, set())
+        variables[DOCUMENT_PART] = variables[DOCUMENT_PART] | SIGNING_VARIABLES | {"seccoes"}
+        
+        with self._template_variables_lock:
+            self._template_variables_cache[cache_key] = variables
+        
+        return variables
+
+    def _render_parts(self, context: dict, part_names: set) -> dict:
+        """
+        Renderiza apenas as partes informadas do template (corpo, cabeçalhos e rodapés).
+        
+        Args:
+            context: Dicionário com o contexto do template.
+            part_names: Nomes dos membros no ZIP que devem ser renderizados.
+            
+        Returns:
+            dict: {nome do membro no ZIP: bytes renderizados}
+        """
+        doc = self._load_template()
+        doc.render_init()
+        rendered = {}
+        
+        if DOCUMENT_PART in part_names:
+            with trace_stage(REPORT_STAGE_SECONDS, "headings"):
+                self.generate_headings_from_structure(doc=doc.get_docx(), headings=self._get_textual_elements(context))
+            with trace_stage(REPORT_STAGE_SECONDS, "render"):
+                tree = doc.fix_tables(doc.build_xml(context))
+                doc.fix_docpr_ids(tree)
+                doc.map_tree(tree)
+                rendered[DOCUMENT_PART] = doc.get_docx().part.blob
+        
+        with trace_stage(REPORT_STAGE_SECONDS, "render"):
+            for uri in (doc.HEADER_URI, doc.FOOTER_URI):
+                for _, part in doc.get_headers_footers(uri):
+                    name = part.partname.lstrip("/")
+                    if name not in part_names:
+                        continue
+                    xml = doc.get_part_xml(part)
+                    encoding = doc.get_headers_footers_encoding(xml)
+                    xml = doc.render_xml_part(doc.patch_xml(xml), part, context)
+                    # Serializa como o python-docx faria ao salvar a parte
+                    rendered[name] = serialize_part_xml(parse_xml(xml.encode(encoding)))
+        
+        return rendered
+
+    def derive_report(self,
+                      previous_path: Union[str, Path],
+                      output_path: str,
+                      context: dict,
+                      changed_keys: set,
+                      cover_image_path: Optional[Union[str, Path]] = None,
+                      target_image_filename: Optional[str] = "image1.png") -> bool:
+        """
+        Gera um relatório a partir de um relatório gerado anteriormente, refazendo apenas o necessário.
+        Sem alterações de contexto, apenas a imagem de capa é trocada no arquivo anterior.
+        Com alterações, somente as partes do template que usam as variáveis alteradas são renderizadas.
+
+        Args:
+            previous_path: Path to the previously generated report.
+            output_path: Path to save the output file.
+            context: Complete template context of the new report.
+            changed_keys: Context keys whose values differ from the previous report.
+            cover_image_path: Optional path to a new cover image (None keeps the previous one).
+            target_image_filename: The filename of the cover image in the DOCX.
+            
+        Returns:
+            bool: True if the report was generated successfully.
+        """
+        try:
+            template_variables = self.get_template_variables()
+            affected_parts = {name for name, variables in template_variables.items() if variables & changed_keys}
+            
+            with zipfile.ZipFile(previous_path, 'r') as zip_ref:
+                previous_members = set(zip_ref.namelist())
+                cover_member = f"word/media/{target_image_filename}"
+                previous_cover = zip_ref.read(cover_member) if cover_member in previous_members else None
+            
+            if cover_image_path:
+                with open(cover_image_path, 'rb') as f:
+                    cover = f.read()
+            else:
+                cover = previous_cover
+            
+            renderable_parts = {DOCUMENT_PART} | {name for name in previous_members
+                                                  if name.startswith(("word/header", "word/footer"))}
+            
+            if not affected_parts <= renderable_parts:
+                # Alteração em partes que não suportam renderização parcial: renderiza tudo
+                self.logger.info(f"Full re-render required for parts: {sorted(affected_parts - renderable_parts)}")
+                if not self.generate_report(context=context, output_path=output_path):
+                    return False
+                if cover is not None:
+                    with trace_stage(REPORT_STAGE_SECONDS, "image_replacement"):
+                        self._rewrite_docx(output_path, output_path, {cover_member: cover}, optimize=self.optimize)
+                return True
+            
+            replacements = self._render_parts(context, affected_parts) if affected_parts else {}
+            if cover_image_path and cover is not None:
+                replacements[cover_member] = cover
+            
+            with trace_stage(REPORT_STAGE_SECONDS, "save"):
+                self._rewrite_docx(previous_path, output_path, replacements, optimize=self.optimize)
+            
+            self.logger.info(f"Report derived successfully: {output_path} (parts: {sorted(replacements)})")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error deriving report: {type(e).__name__} - {e}")
+            return False
+
+    def _get_textual_elements(self, context: dict) -> list:
+        """Extrai os elementos textuais (segunda seção) de `seccoes` do contexto (ver `outline.get_textual_elements`)."""
+        return get_textual_elements(context)
+
+    def prepare_document(self, headings: list) -> DocxTemplate:
+        """
+        Carrega o template e insere a estrutura de títulos, deixando o documento pronto para renderização.
+        Não depende das demais variáveis do contexto, podendo ser executado antes de elas estarem disponíveis.
+        
+        Args:
+            headings: Lista de dicionários com os títulos e subtítulos.
+            
+        Returns:
+            DocxTemplate: Template com os títulos inseridos, ainda não renderizado.
+        """
+        doc = self._load_template()
+        with trace_stage(REPORT_STAGE_SECONDS, "headings"):
+            self.generate_headings_from_structure(doc=doc.get_docx(), headings=headings)
+        return doc
+
     def generate_report(self,
                         context: dict,
                         output_path: str,
                         cover_image_path: Optional[Union[str, Path]] = None,
-                        target_image_filename: Optional[str] = "image1.png") -> bool:
+                        target_image_filename: Optional[str] = "image1.png",
+                        doc: Optional[DocxTemplate] = None) -> bool:
         """
         Generates the report using the template and provided context.
 
@@ -198,38 +610,30 @@ class ReportGenerator:
             context: Dictionary with the template context.
             output_path: Path to save the output file.
             cover_image_path: Optional path to the cover image.
-            replace_image: If True, replaces an existing image in the DOCX file.
-            target_image_filename: The filename of the image in the DOCX to replace (required if replace_image is True).
+            target_image_filename: The filename of the image in the DOCX to replace (required if cover_image_path is given).
+            doc: Optional document already returned by `prepare_document` (headings are not inserted again).
             
         Returns:
             bool: True if the report was generated successfully.
         """
         try:
-            doc = DocxTemplate(self.template_path)
-
-            # Extrai dados hierárquicos do contexto
-            _, textual_elements, _ = [elem.get("data", []) for elem in context.get("seccoes", [])]
+            if doc is None:
+                # Extrai dados hierárquicos do contexto e os insere no template
+                doc = self.prepare_document(self._get_textual_elements(context))
             
-            # Adiciona os dados hierárquicos (headings) ao contexto
-            self.generate_headings_from_structure(doc=doc.get_docx(), headings=textual_elements)
+            with trace_stage(REPORT_STAGE_SECONDS, "render"):
+                doc.render(context)
+            with trace_stage(REPORT_STAGE_SECONDS, "save"):
+                doc.save(output_path)
             
             if cover_image_path:
-                # Render the document and save it temporarily
-                temp_output = "temp_report.docx"
-                doc.render(context)
-                doc.save(temp_output)
-
                 if not target_image_filename:
                     raise ValueError("target_image_filename must be provided.")
 
-                if not self.replace_existing_image(temp_output, target_image_filename, cover_image_path):
+                if not self.replace_existing_image(output_path, target_image_filename, cover_image_path):
                     return False
-
-                # Move the temporary file to the final output path
-                shutil.move(temp_output, output_path)
-            else:
-                doc.render(context)
-                doc.save(output_path)
+            elif self.optimize:
+                self.optimize_docx(output_path)
 
             self.logger.info(f"Report generated successfully: {output_path}")
             return True
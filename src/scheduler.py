@@ -0,0 +1,204 @@
+from concurrent.futures import Future, Executor
+from collections import deque
+import contextvars
+import logging
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    from .metrics import REPORT_JOB_ESTIMATED_MEMORY_BYTES, REPORT_STAGE_SECONDS
+    from .tracing import record_span
+except ImportError:
+    from metrics import REPORT_JOB_ESTIMATED_MEMORY_BYTES, REPORT_STAGE_SECONDS
+    from tracing import record_span
+
+# Parâmetros da estimativa de memória de uma tarefa, medidos com o template padrão
+BASE_JOB_MEMORY = 10 * 1024 * 1024  # Árvore lxml do template, pacote DOCX e renderização
+MEMORY_PER_HEADING = 8 * 1024  # Parágrafos inseridos e renderizados por título
+PAYLOAD_MEMORY_FACTOR = 4  # JSON decodificado, cópias formatadas e contexto
+FILE_MEMORY_FACTOR = 2  # Arquivos lidos por inteiro e reescritos no ZIP
+
+
+def count_headings(sections) -> int:
+    """Conta os títulos de todas as seções (iterativamente, sem copiar a árvore)."""
+    count = 0
+    stack = list(sections or [])
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, dict):
+            continue
+        count += 1
+        stack.extend(node.get("data", []) or [])
+        stack.extend(node.get("subtitles", []) or [])
+    return count
+
+
+def estimate_job_memory(heading_count: int, payload_bytes: int, file_bytes: int = 0) -> int:
+    """
+    Estima a memória de pico de uma tarefa de geração de relatório.
+
+    Args:
+        heading_count: Quantidade de títulos da estrutura de seções.
+        payload_bytes: Tamanho do payload JSON recebido.
+        file_bytes: Tamanho dos arquivos lidos pela tarefa (imagem de capa, relatório base).
+
+    Returns:
+        int: Memória estimada em bytes.
+    """
+    return (BASE_JOB_MEMORY
+            + heading_count * MEMORY_PER_HEADING
+            + payload_bytes * PAYLOAD_MEMORY_FACTOR
+            + file_bytes * FILE_MEMORY_FACTOR)
+
+
+def get_peak_rss() -> int:
+    """Retorna o pico de memória residente do processo, em bytes (0 se indisponível)."""
+    if resource is None:
+        return 0
+    # ru_maxrss é informado em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemoryBudgetScheduler:
+    """
+    Admite tarefas no executor apenas enquanto a soma da memória estimada
+    das tarefas em execução couber no orçamento configurado e houver um worker livre.
+    As tarefas aguardam em fila (FIFO) até haver orçamento disponível.
+    """
+
+    def __init__(self, executor: Executor, budget_bytes: int, max_running: int = None, history_size: int = 100):
+        """
+        Args:
+            executor: Executor das tarefas.
+            budget_bytes: Orçamento de memória estimada, em bytes.
+            max_running: Máximo de tarefas admitidas ao mesmo tempo. Por padrão, a quantidade de workers do
+                executor: as tarefas nunca aguardam na fila interna do executor, onde já ocupariam o orçamento.
+            history_size: Quantidade de tarefas concluídas mantidas nas estatísticas.
+        """
+        self.executor = executor
+        self.budget_bytes = budget_bytes
+        self.max_running = max_running or getattr(executor, "_max_workers", None)
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._queue = deque()
+        self._running = {}
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._finished_jobs = deque(maxlen=history_size)
+
+    def submit(self, job_id: str, estimated_bytes: int, fn, *args, **kwargs) -> Future:
+        """
+        Enfileira uma tarefa, que será enviada ao executor quando houver orçamento de memória e um worker livre.
+        A tarefa é executada no contexto (contextvars) de quem a enfileirou.
+
+        Args:
+            job_id: Identificador da tarefa.
+            estimated_bytes: Memória estimada da tarefa (ver `estimate_job_memory`).
+            fn: Função a ser executada.
+
+        Returns:
+            Future: Resultado da tarefa.
+        """
+        future = Future()
+        with self._lock:
+            self._queue.append((job_id, estimated_bytes, fn, args, kwargs, future, time.monotonic(),
+                                contextvars.copy_context()))
+            admitted = self._admit_locked()
+            queued_jobs = len(self._queue)
+        
+        if queued_jobs:
+            self.logger.info(f"Tarefa {job_id} aguardando orçamento de memória ({queued_jobs} na fila)")
+        self._start(admitted)
+        return future
+
+    def _admit_locked(self) -> list:
+        admitted = []
+        while self._queue:
+            if self.max_running and len(self._running) >= self.max_running:
+                break
+            job_id, estimated_bytes = self._queue[0][:2]
+            # Uma tarefa maior que o orçamento só é admitida quando nenhuma outra estiver em execução
+            if self._running and self._in_use + estimated_bytes > self.budget_bytes:
+                break
+            admitted.append(self._queue.popleft())
+            self._running[job_id] = estimated_bytes
+            self._in_use += estimated_bytes
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+        return admitted
+
+    def _start(self, admitted: list) -> None:
+        for job in admitted:
+            job_id, estimated_bytes, fn, args, kwargs, future, queued_at, context = job
+            if not future.set_running_or_notify_cancel():
+                self._release(job_id, estimated_bytes, queued_at, time.monotonic(), get_peak_rss())
+                continue
+            REPORT_JOB_ESTIMATED_MEMORY_BYTES.observe(estimated_bytes)
+            self.executor.submit(self._run, *job)
+
+    def _run(self, job_id, estimated_bytes, fn, args, kwargs, future, queued_at, context) -> None:
+        # Os tempos são medidos no worker: a espera na fila termina quando a tarefa começa a executar
+        started_at = time.monotonic()
+        peak_rss_at_start = get_peak_rss()
+        REPORT_STAGE_SECONDS.observe(started_at - queued_at, stage="queue_wait")
+        now = time.time()
+        context.run(record_span, "queue_wait", now - (started_at - queued_at), now, job_id=job_id)
+        try:
+            result = context.run(fn, *args, **kwargs)
+        except BaseException as e:
+            self._release(job_id, estimated_bytes, queued_at, started_at, peak_rss_at_start)
+            future.set_exception(e)
+        else:
+            self._release(job_id, estimated_bytes, queued_at, started_at, peak_rss_at_start)
+            future.set_result(result)
+
+    def _release(self, job_id, estimated_bytes, queued_at, started_at, peak_rss_at_start) -> None:
+        finished_at = time.monotonic()
+        peak_rss = get_peak_rss()
+        with self._lock:
+            self._running.pop(job_id, None)
+            self._in_use -= estimated_bytes
+            self._finished_jobs.append({
+                "job_id": job_id,
+                "estimated_bytes": estimated_bytes,
+                "queue_seconds": round(started_at - queued_at, 3),
+                "run_seconds": round(finished_at - started_at, 3),
+                # Aumento do pico de memória residente do processo durante a tarefa (limite superior
+                # da memória da tarefa; inclui as tarefas simultâneas)
+                "peak_rss_increase_bytes": peak_rss - peak_rss_at_start,
+                "process_peak_rss_bytes": peak_rss,
+            })
+            admitted = self._admit_locked()
+        self._start(admitted)
+
+    def memory(self) -> tuple:
+        """Retorna o orçamento, a memória estimada em uso e o pico de uso, em bytes."""
+        with self._lock:
+            return self.budget_bytes, self._in_use, self._peak_in_use
+
+    def counts(self) -> tuple:
+        """Retorna a quantidade de tarefas na fila e em execução."""
+        with self._lock:
+            return len(self._queue), len(self._running)
+
+    def stats(self) -> dict:
+        """Retorna o estado atual do orçamento de memória e das tarefas."""
+        with self._lock:
+            return {
+                "budget_bytes": self.budget_bytes,
+                "max_running": self.max_running,
+                "in_use_bytes": self._in_use,
+                "peak_in_use_bytes": self._peak_in_use,
+                "queued_jobs": len(self._queue),
+                "running_jobs": [
+                    {"job_id": job_id, "estimated_bytes": estimated_bytes}
+                    for job_id, estimated_bytes in self._running.items()
+                ],
+                "finished_jobs": list(self._finished_jobs),
+                "process_peak_rss_bytes": get_peak_rss(),
+            }
@@ -1,26 +1,68 @@
 from shareplum import Site
 from shareplum import Office365
 import os
+import threading
+import time
 from dotenv import load_dotenv
 from babel.numbers import format_currency
-from pathlib import Path
 
 try:
-    from .utils import load_json
+    from .mapping_registry import get_registry
+    from .metrics import SHAREPOINT_STAGE_SECONDS
+    from .tracing import start_span, trace_stage
 except ImportError:
-    from utils import load_json
+    from mapping_registry import get_registry
+    from metrics import SHAREPOINT_STAGE_SECONDS
+    from tracing import start_span, trace_stage
 
 class Sharepoint():
+    # Site autenticado compartilhado entre as instâncias: (momento da conexão, site)
+    _site_cache = None
+    _site_lock = threading.Lock()
+
     def __init__(self) -> None:
+        self.site = self._get_site()
+        # Mapeamentos em memória, compartilhados entre as instâncias (sem leitura de arquivo)
+        registry = get_registry()
+        self.diretorias_mapping = registry.get("diretorias")
+        self.divisoes_mapping = registry.get("divisoes")
+        
+
+    @classmethod
+    def _get_site(cls):
+        """
+        Retorna o site autenticado do processo, conectando na primeira chamada e após
+        SHAREPOINT_SESSION_MAX_AGE_SECONDS (renovação do cookie do Office365).
+        """
+        with cls._site_lock:
+            max_age = int(os.getenv("SHAREPOINT_SESSION_MAX_AGE_SECONDS", 1800))
+            if cls._site_cache is None or time.monotonic() - cls._site_cache[0] > max_age:
+                cls._site_cache = (time.monotonic(), cls._connect())
+            return cls._site_cache[1]
+
+    @classmethod
+    def reset_session(cls, site=None) -> None:
+        """Descarta o site compartilhado (ou apenas se ainda for `site`), forçando uma nova autenticação."""
+        with cls._site_lock:
+            if cls._site_cache is not None and (site is None or cls._site_cache[1] is site):
+                cls._site_cache = None
+
+    @staticmethod
+    def _connect():
         load_dotenv()
-        site_url_base = "https://tcepi365.sharepoint.com"
-        site_url = "https://tcepi365.sharepoint.com/sites/SecretariadeControleExterno"
-        username = os.getenv("USUARIO")
-        password = os.getenv("SENHA")
-        self.site = Site(site_url, authcookie=Office365(site_url_base, username=username, password=password).GetCookies())
-        self.diretorias_mapping = load_json(Path('src/mappings/diretorias.json'))
-        self.divisoes_mapping = load_json(Path('src/mappings/divisoes.json'))
+        site_url_base = os.getenv("SHAREPOINT_SITE_URL_BASE", "https://tcepi365.sharepoint.com")
+        site_url = os.getenv("SHAREPOINT_SITE_URL", "https://tcepi365.sharepoint.com/sites/SecretariadeControleExterno")
         
+        with trace_stage(SHAREPOINT_STAGE_SECONDS, "auth", name="sharepoint.auth"):
+            if os.getenv("SHAREPOINT_AUTH", "office365") == "none":
+                # Site sem autenticação (ex.: stub local usado nos testes de carga)
+                authcookie = None
+            else:
+                username = os.getenv("USUARIO")
+                password = os.getenv("SENHA")
+                authcookie = Office365(site_url_base, username=username, password=password).GetCookies()
+            
+            return Site(site_url, authcookie=authcookie)
 
     def get_all_lists(self):
         lists = self.site.GetListCollection()
@@ -202,9 +244,17 @@ class Sharepoint():
         if item_id:
             query = {'Where': [('Eq', 'ID', str(item_id))]}
             
-        data = self._get_data(list_name='Cadastro de Ação de Controle', query=query)
-        
-        return self._transform_data(data)
+        with start_span("Sharepoint.get_acao_controle_data", item_id=item_id):
+            with trace_stage(SHAREPOINT_STAGE_SECONDS, "query", name="sharepoint.query"):
+                try:
+                    data = self._get_data(list_name='Cadastro de Ação de Controle', query=query)
+                except Exception:
+                    # Sessão possivelmente expirada: a próxima instância autentica novamente
+                    self.reset_session(self.site)
+                    raise
+            
+            with trace_stage(SHAREPOINT_STAGE_SECONDS, "transform", name="sharepoint.transform"):
+                return self._transform_data(data)
 
 if __name__ == '__main__':
     
@@ -0,0 +1,387 @@
+from collections import namedtuple
+from contextlib import contextmanager
+import datetime
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+# Dependência opcional, necessária apenas para o backend S3: importada ao criar o primeiro S3Storage,
+# sem custo de inicialização para os processos que usam o armazenamento local
+boto3 = None
+ClientError = None
+
+# Objeto armazenado: chave ("<área>/<nome>"), tamanho em bytes e data de modificação (UTC)
+StoredObject = namedtuple("StoredObject", ["key", "size", "modified"])
+
+# Prefixo dos arquivos temporários de gravação atômica no backend local
+TEMP_PREFIX = ".tmp-"
+
+# ID da regra de ciclo de vida que expira os objetos no backend S3
+EXPIRATION_RULE_ID = "graau-expiracao"
+
+
+class Storage:
+    """
+    Interface dos backends de armazenamento dos artefatos da API (relatórios, imagens de capa,
+    arquivos de status e metadados). As chaves têm a forma "<área>/<nome>", ex.: "reports/relatorio.docx".
+    As gravações são atômicas: leitores nunca veem um objeto parcialmente escrito.
+    """
+
+    def save_stream(self, key: str, stream) -> None:
+        """Grava o conteúdo de um arquivo aberto (lido em blocos, sem carregá-lo inteiro em memória)."""
+        raise NotImplementedError
+
+    def put_file(self, key: str, local_path: str) -> None:
+        """Move um arquivo local para o armazenamento (o arquivo local deixa de existir)."""
+        raise NotImplementedError
+
+    def open(self, key: str):
+        """
+        Abre um objeto para leitura em blocos, com suporte a `seek` (downloads parciais).
+        Lança FileNotFoundError se não existir.
+        """
+        raise NotImplementedError
+
+    @contextmanager
+    def local_file(self, key: str):
+        """Disponibiliza o objeto como arquivo local durante o bloco (para bibliotecas que exigem um caminho)."""
+        raise NotImplementedError
+
+    def size(self, key: str) -> int:
+        """Tamanho do objeto em bytes. Lança FileNotFoundError se não existir."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """Remove o objeto, se existir."""
+        raise NotImplementedError
+
+    def list(self, prefix: str) -> list:
+        """Lista os objetos cujas chaves começam com `prefix` (ex.: "covers/" ou "covers/cover_123")."""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.size(key)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def write_bytes(self, key: str, data: bytes) -> None:
+        self.save_stream(key, io.BytesIO(data))
+
+    def read_bytes(self, key: str) -> bytes:
+        with self.open(key) as f:
+            return f.read()
+
+    def write_json(self, key: str, data) -> None:
+        self.write_bytes(key, json.dumps(data, indent=4).encode("utf-8"))
+
+    def read_json(self, key: str, default=None):
+        """Lê um objeto JSON, retornando `default` se ele não existir ou for inválido."""
+        try:
+            return json.loads(self.read_bytes(key))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return default
+
+    def usage(self, prefix: str) -> int:
+        """Espaço ocupado pelos objetos com o prefixo informado, em bytes."""
+        return sum(obj.size for obj in self.list(prefix))
+
+    def expire(self, prefix: str, max_age_seconds: float) -> int:
+        """
+        Remove os objetos com o prefixo informado modificados há mais de `max_age_seconds`.
+
+        Returns:
+            int: Quantidade de objetos removidos.
+        """
+        limit = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=max_age_seconds)
+        expired = [obj.key for obj in self.list(prefix) if obj.modified < limit]
+        for key in expired:
+            self.delete(key)
+        return len(expired)
+
+
+class LocalStorage(Storage):
+    """Armazenamento em diretórios locais, um por área."""
+
+    def __init__(self, directories: dict):
+        """
+        Args:
+            directories: {área: diretório}, ex.: {"reports": "src/reports", "covers": "src/temp_cover_images"}.
+        """
+        self.directories = directories
+        for directory in directories.values():
+            os.makedirs(directory, exist_ok=True)
+
+    def _split(self, key: str):
+        area, _, name = key.partition("/")
+        if area not in self.directories:
+            raise ValueError(f"Área de armazenamento desconhecida: {area}")
+        if "/" in name or "\\" in name or name in ("", ".", ".."):
+            raise ValueError(f"Nome de objeto inválido: {name}")
+        return area, name
+
+    def path(self, key: str) -> str:
+        """Caminho local do objeto."""
+        area, name = self._split(key)
+        return os.path.join(self.directories[area], name)
+
+    def save_stream(self, key: str, stream) -> None:
+        path = self.path(key)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=TEMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                shutil.copyfileobj(stream, f)
+            # Substitui o objeto de forma atômica
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def put_file(self, key: str, local_path: str) -> None:
+        try:
+            os.replace(local_path, self.path(key))
+        except OSError:
+            # Sistemas de arquivos diferentes: copia (de forma atômica) e remove o original
+            with open(local_path, "rb") as f:
+                self.save_stream(key, f)
+            os.remove(local_path)
+
+    def open(self, key: str):
+        return open(self.path(key), "rb")
+
+    @contextmanager
+    def local_file(self, key: str):
+        path = self.path(key)
+        if not os.path.exists(path):
+            raise FileNotFoundError(key)
+        yield path
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self.path(key))
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def list(self, prefix: str) -> list:
+        area, _, name_prefix = prefix.partition("/")
+        directory = self.directories.get(area)
+        if not directory or not os.path.isdir(directory):
+            return []
+
+        objects = []
+        for entry in os.scandir(directory):
+            # Arquivos ocultos incluem .gitkeep e gravações em andamento
+            if entry.name.startswith(".") or not entry.name.startswith(name_prefix) or not entry.is_file():
+                continue
+            stat = entry.stat()
+            modified = datetime.datetime.fromtimestamp(stat.st_mtime, datetime.timezone.utc)
+            objects.append(StoredObject(f"{area}/{entry.name}", stat.st_size, modified))
+        return objects
+
+
+def _import_boto3() -> None:
+    global boto3, ClientError
+    if boto3 is not None:
+        return
+    try:
+        import boto3 as boto3_module
+        from botocore.exceptions import ClientError as client_error
+    except ImportError:
+        raise RuntimeError("O backend S3 requer o pacote boto3 (pip install boto3)")
+    boto3, ClientError = boto3_module, client_error
+
+
+class _S3ObjectReader(io.RawIOBase):
+    """Leitura de um objeto do S3 com suporte a `seek`: cada reposicionamento abre uma leitura a partir do novo offset (Range)."""
+
+    def __init__(self, client, bucket: str, key: str, size: int):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.size = size
+        self._position = 0
+        self._body = None
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset != self._position:
+            self._close_body()
+            self._position = max(0, offset)
+        return self._position
+
+    def readinto(self, buffer):
+        if self._position >= self.size:
+            return 0
+        if self._body is None:
+            self._body = self.client.get_object(
+                Bucket=self.bucket, Key=self.key, Range=f"bytes={self._position}-"
+            )["Body"]
+        data = self._body.read(len(buffer))
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def _close_body(self):
+        if self._body is not None:
+            self._body.close()
+            self._body = None
+
+    def close(self):
+        self._close_body()
+        super().close()
+
+
+class S3Storage(Storage):
+    """
+    Armazenamento em um bucket compatível com S3 (AWS S3, MinIO, etc.), compartilhado entre instâncias da API.
+    Requer o pacote `boto3`.
+    """
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url=None, expiration_days=None, client=None):
+        """
+        Args:
+            bucket: Nome do bucket.
+            prefix: Prefixo aplicado a todas as chaves (ex.: "graau/").
+            endpoint_url: Endpoint do serviço (ex.: MinIO local); None usa o da AWS.
+            expiration_days: Se informado, configura uma regra de ciclo de vida que expira os objetos
+                do prefixo no próprio serviço, mesmo que nenhuma instância execute a limpeza.
+                Requer um prefixo: sem ele, a regra expiraria todos os objetos do bucket.
+            client: Cliente boto3 já configurado (opcional).
+        """
+        _import_boto3()
+        if client is None:
+            client = boto3.client("s3", endpoint_url=endpoint_url)
+
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.logger = logging.getLogger(__name__)
+
+        if expiration_days:
+            self.configure_expiration(expiration_days)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def _is_not_found(self, error) -> bool:
+        return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def configure_expiration(self, days: int) -> None:
+        """
+        Configura a regra de ciclo de vida que expira os objetos do prefixo após `days` dias.
+        As demais regras do bucket são mantidas: apenas a regra EXPIRATION_RULE_ID é adicionada ou substituída.
+        Sem prefixo, a regra não é configurada, pois alcançaria todos os objetos do bucket.
+        """
+        if not self.prefix:
+            self.logger.warning(
+                f"Expiração não configurada no bucket {self.bucket}: defina S3_PREFIX para restringir a regra "
+                f"aos objetos da API (sem prefixo, ela expiraria todos os objetos do bucket)"
+            )
+            return
+
+        try:
+            try:
+                rules = self.client.get_bucket_lifecycle_configuration(Bucket=self.bucket)["Rules"]
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") != "NoSuchLifecycleConfiguration":
+                    raise
+                rules = []
+
+            rule = {
+                "ID": EXPIRATION_RULE_ID,
+                "Filter": {"Prefix": self.prefix},
+                "Status": "Enabled",
+                "Expiration": {"Days": days},
+            }
+            if rule in rules:
+                return
+            self.client.put_bucket_lifecycle_configuration(
+                Bucket=self.bucket,
+                LifecycleConfiguration={"Rules": [r for r in rules if r.get("ID") != EXPIRATION_RULE_ID] + [rule]},
+            )
+        except ClientError as e:
+            self.logger.warning(f"Não foi possível configurar a expiração no bucket {self.bucket}: {str(e)}")
+
+    def save_stream(self, key: str, stream) -> None:
+        # Envio em partes (multipart) para arquivos grandes; o objeto só fica visível ao final
+        self.client.upload_fileobj(stream, self.bucket, self._key(key))
+
+    def put_file(self, key: str, local_path: str) -> None:
+        self.client.upload_file(local_path, self.bucket, self._key(key))
+        os.remove(local_path)
+
+    def open(self, key: str):
+        # O objeto só é lido na primeira chamada a read, a partir da posição atual
+        return _S3ObjectReader(self.client, self.bucket, self._key(key), self.size(key))
+
+    @contextmanager
+    def local_file(self, key: str):
+        fd, temp_path = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+        try:
+            with os.fdopen(fd, "wb") as f:
+                try:
+                    self.client.download_fileobj(self.bucket, self._key(key), f)
+                except ClientError as e:
+                    if self._is_not_found(e):
+                        raise FileNotFoundError(key)
+                    raise
+            yield temp_path
+        finally:
+            os.remove(temp_path)
+
+    def size(self, key: str) -> int:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(key))["ContentLength"]
+        except ClientError as e:
+            if self._is_not_found(e):
+                raise FileNotFoundError(key)
+            raise
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def list(self, prefix: str) -> list:
+        objects = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            for item in page.get("Contents", []):
+                objects.append(StoredObject(item["Key"][len(self.prefix):], item["Size"], item["LastModified"]))
+        return objects
+
+
+def create_storage(backend: str, directories: dict = None, bucket: str = None, prefix: str = "",
+                   endpoint_url: str = None, expiration_days: int = None) -> Storage:
+    """
+    Cria o backend de armazenamento configurado.
+
+    Args:
+        backend: "local" ou "s3".
+        directories: Diretórios por área (backend local).
+        bucket, prefix, endpoint_url, expiration_days: Configuração do backend S3.
+    """
+    if backend == "local":
+        return LocalStorage(directories)
+    if backend == "s3":
+        if not bucket:
+            raise ValueError("O backend S3 requer o nome do bucket (S3_BUCKET)")
+        return S3Storage(bucket, prefix=prefix, endpoint_url=endpoint_url, expiration_days=expiration_days)
+    raise ValueError(f"Backend de armazenamento desconhecido: {backend}")
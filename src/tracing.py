@@ -0,0 +1,167 @@
+from contextlib import contextmanager
+import contextvars
+import functools
+import json
+import logging
+import re
+import secrets
+import threading
+import time
+
+SERVICE_NAME = "graau-back"
+
+# Span ativo no contexto atual (requisição, tarefa do executor ou consulta ao SharePoint)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+_TRACEPARENT_PATTERN = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+class JsonLinesExporter:
+    """Grava os spans finalizados em um arquivo JSON-lines, no formato de span do Zipkin (v2)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span) -> None:
+        line = json.dumps(span.to_zipkin(), ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+_exporter = None
+
+
+def configure_exporter(export_path=None) -> None:
+    """
+    Define o destino dos spans finalizados.
+
+    Args:
+        export_path: Arquivo JSON-lines que receberá os spans. None desativa a exportação
+            (os spans continuam sendo propagados, e o trace_id continua disponível nos logs).
+    """
+    global _exporter
+    _exporter = JsonLinesExporter(export_path) if export_path else None
+
+
+class Span:
+    """Operação com início e fim dentro de um trace. Usado como gerenciador de contexto."""
+
+    def __init__(self, name: str, trace_id: str, parent_id=None, kind=None, attributes=None, start_time=None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.start_time = start_time if start_time is not None else time.time()
+        self.end_time = None
+        self._token = None
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def end(self, end_time=None) -> None:
+        if self.end_time is not None:
+            return
+        self.end_time = end_time if end_time is not None else time.time()
+        if _exporter is not None:
+            try:
+                _exporter.export(self)
+            except OSError as e:
+                logging.getLogger(__name__).warning(f"Falha ao exportar span {self.name}: {str(e)}")
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.set_attribute("error", f"{exc_type.__name__}: {exc}")
+        self.end()
+        _current_span.reset(self._token)
+        return False
+
+    def to_zipkin(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "id": self.span_id,
+            "name": self.name,
+            "timestamp": int(self.start_time * 1_000_000),
+            "duration": max(1, int((self.end_time - self.start_time) * 1_000_000)),
+            "localEndpoint": {"serviceName": SERVICE_NAME},
+            "tags": {key: str(value) for key, value in self.attributes.items()},
+        }
+        if self.parent_id:
+            span["parentId"] = self.parent_id
+        if self.kind:
+            span["kind"] = self.kind
+        return span
+
+
+def current_span():
+    return _current_span.get()
+
+
+def current_trace_id():
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+
+def start_span(name: str, kind=None, traceparent=None, start_time=None, **attributes) -> Span:
+    """
+    Cria um span filho do span ativo (ou a raiz de um novo trace). O span só se torna
+    o ativo ao ser usado como gerenciador de contexto.
+
+    Args:
+        name: Nome da operação.
+        kind: Tipo do span no Zipkin (ex.: "SERVER"), opcional.
+        traceparent: Cabeçalho W3C `traceparent` recebido, para continuar um trace externo.
+        start_time: Início do span (epoch, em segundos); padrão: agora.
+        **attributes: Atributos do span.
+    """
+    parent = _current_span.get()
+    if parent is not None:
+        return Span(name, parent.trace_id, parent.span_id, kind, attributes, start_time)
+
+    match = _TRACEPARENT_PATTERN.match(traceparent or "")
+    if match:
+        return Span(name, match.group(1), match.group(2), kind, attributes, start_time)
+    return Span(name, secrets.token_hex(16), None, kind, attributes, start_time)
+
+
+def record_span(name: str, start_time: float, end_time: float, **attributes) -> None:
+    """Registra um span já concluído (ex.: tempo de espera em fila), filho do span ativo."""
+    start_span(name, start_time=start_time, **attributes).end(end_time)
+
+
+def submit_with_context(executor, fn, *args, **kwargs):
+    """Envia `fn` ao executor preservando o contexto atual (e, portanto, o span ativo)."""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def traced(name: str):
+    """Decorador que executa a função dentro de um span com o nome informado."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with start_span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def trace_stage(histogram, stage: str, name=None):
+    """Mede uma etapa no histograma de métricas (label `stage`) e em um span do trace atual."""
+    with start_span(name or stage), histogram.time(stage=stage):
+        yield
+
+
+class TraceContextFilter(logging.Filter):
+    """Adiciona o `trace_id` do span ativo aos registros de log."""
+
+    def filter(self, record):
+        record.trace_id = current_trace_id() or "-"
+        return True
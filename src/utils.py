@@ -1,6 +1,10 @@
 import json
 from unidecode import unidecode
-from pathlib import Path
+
+try:
+    from .mapping_registry import get_registry
+except ImportError:
+    from mapping_registry import get_registry
 
 def load_json(path):
     try:
@@ -37,21 +41,71 @@ def load_json(path):
 #     # Junta com underline
 #     return '_'.join(palavras_filtradas)
 
+def _format_path(path):
+    """Monta o caminho legível (ex.: [1].data[0].subtitles[2]) de um nó de seções."""
+    segments = []
+    while path:
+        path, segment = path
+        segments.append(segment)
+    return "".join(reversed(segments))
+
+class NormalizedSections(list):
+    """Seções já normalizadas por _clean_secoes: não são percorridas novamente (ex.: em format_data após a validação)."""
+
 def _clean_secoes(sections):
-    def clean(secao):
+    """
+    Normaliza a árvore de seções em uma única passagem iterativa.
+    Seções sem "data" nem "subtitles" são descartadas, como no formato do frontend.
+    Seções já normalizadas são retornadas sem alteração.
+    
+    Args:
+        sections: Lista de seções recebida do frontend.
+        
+    Returns:
+        NormalizedSections: Seções normalizadas.
+        
+    Raises:
+        ValueError: Se algum nó não tiver a estrutura esperada.
+    """
+    if isinstance(sections, NormalizedSections):
+        return sections
+    if not isinstance(sections, list):
+        raise ValueError("seções devem ser uma lista")
+    
+    result = NormalizedSections()
+    # Pilha de (é entrada de "data", nó de origem, lista de destino, caminho)
+    stack = [(False, section, result, (None, f"[{i}]")) for i, section in reversed(list(enumerate(sections)))]
+    
+    while stack:
+        is_data_entry, secao, target, path = stack.pop()
+        
+        if not isinstance(secao, dict):
+            raise ValueError(f"{_format_path(path)} deve ser um objeto")
+        
         title = secao.get("title")
-        if "data" in secao:
-            data = [{
-                "title": d.get("title"),
-                "subtitles": [clean_sub for sub in d.get("subtitles", []) if (clean_sub := clean(sub))]
-            } for d in secao["data"]]
-            return {"title": title, "data": [d for d in data]}
-        elif "subtitles" in secao:
-            subtitles = [clean_sub for sub in secao["subtitles"] if (clean_sub := clean(sub))]
-            return {"title": title, "subtitles": subtitles}
-        return None
+        if not isinstance(title, str):
+            raise ValueError(f"{_format_path(path)}.title deve ser um texto")
+        
+        if is_data_entry or "subtitles" in secao and "data" not in secao:
+            key = "subtitles"
+            children = secao.get("subtitles", [])
+        elif "data" in secao:
+            key = "data"
+            children = secao["data"]
+        else:
+            continue
+        
+        if not isinstance(children, list):
+            raise ValueError(f"{_format_path(path)}.{key} deve ser uma lista")
+        
+        cleaned_children = []
+        target.append({"title": title, key: cleaned_children})
+        
+        # Empilha em ordem reversa para que os filhos sejam processados na ordem original
+        for i in range(len(children) - 1, -1, -1):
+            stack.append((key == "data", children[i], cleaned_children, (path, f".{key}[{i}]")))
     
-    return [clean_section for section in sections if (clean_section := clean(section))]
+    return result
 
 def format_data(data: dict):
     """
@@ -89,24 +143,5 @@ def get_status_processo(tipo_relatorio: str, processo_tipo: str):
     Returns:
         str: Status do processo.
     """
-
-    mapping_path = Path("src/mappings/status_processo.json")
-    mapping = load_json(mapping_path)
-    
-    first_layer = mapping.get(tipo_relatorio.lower(), {})
-    
-    if not first_layer:
-        return ""
-    
-    # Pega lista de opções de tipos de processo e remove o último elemento, que é o "default"
-    options = list(first_layer.keys())
-    options.pop(-1)
-    
-    # Verifica se o tipo de processo está na lista de opções, capturando o índice
-    bool_list = [option in processo_tipo.lower() for option in options]
-    true_index = bool_list.index(True) if any(bool_list) else -1
-    
-    if true_index != -1:
-        return first_layer.get(options[true_index], "")
-    else:
-        return first_layer.get("default", "")
+    # Consulta em memória: o mapeamento é carregado uma vez e recarregado quando o arquivo muda
+    return get_registry().get_status_processo(tipo_relatorio, processo_tipo)
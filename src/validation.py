@@ -0,0 +1,132 @@
+try:
+    from .utils import _clean_secoes
+except ImportError:
+    from utils import _clean_secoes
+
+
+class ValidationError(ValueError):
+    """Erro de validação de um payload recebido pela API."""
+
+
+def _type_name(expected_type):
+    names = {dict: "objeto", list: "lista", str: "texto", int: "número", bool: "booleano", type(None): "nulo"}
+    types = expected_type if isinstance(expected_type, tuple) else (expected_type,)
+    return " ou ".join(names.get(t, t.__name__) for t in types)
+
+
+def _compile(schema: dict, path: str):
+    expected_type = schema.get("type")
+    type_name = _type_name(expected_type) if expected_type else None
+    length = schema.get("length")
+    required = tuple(schema.get("required", ()))
+    required_unless = schema.get("required_unless")
+    normalize = schema.get("normalize")
+    fields = tuple(
+        (name, _compile(spec, f"{path}.{name}" if path else name))
+        for name, spec in schema.get("fields", {}).items()
+    )
+    prefix = f"{path}." if path else ""
+
+    def validate(value, root):
+        if expected_type and not isinstance(value, expected_type):
+            raise ValidationError(f"Campo '{path}' deve ser do tipo {type_name}")
+
+        if required and not (required_unless and root.get(required_unless)):
+            missing_fields = [f"{prefix}{field}" for field in required if field not in value]
+            if missing_fields:
+                raise ValidationError(f"Campo(s) obrigatório(s) ausente(s): {', '.join(missing_fields)}")
+
+        # Os valores normalizados substituem os originais no próprio payload
+        for name, validate_field in fields:
+            if name in value:
+                value[name] = validate_field(value[name], root)
+
+        if normalize:
+            try:
+                value = normalize(value)
+            except ValueError as e:
+                raise ValidationError(f"Campo '{path}' inválido: {str(e)}")
+
+        # Verificado após a normalização, que pode descartar elementos (ex.: seções sem conteúdo)
+        if length is not None and len(value) != length:
+            raise ValidationError(f"Campo '{path}' deve ter exatamente {length} elementos, recebido {len(value)}")
+
+        return value
+
+    return validate
+
+
+def compile_schema(schema: dict):
+    """
+    Compila um schema declarativo em uma função de validação.
+    O schema é percorrido uma única vez; a função resultante apenas executa as verificações.
+
+    Chaves suportadas em cada nível do schema:
+    - type: tipo (ou tupla de tipos) esperado
+    - length: quantidade exata de elementos (após a normalização)
+    - required: campos obrigatórios
+    - required_unless: campo da raiz do payload que, quando presente, dispensa os obrigatórios
+    - fields: schemas dos campos do objeto
+    - normalize: função que normaliza o valor (ValueError indica valor inválido)
+
+    Args:
+        schema: Schema declarativo.
+
+    Returns:
+        callable: Função que recebe o payload, o valida e o retorna normalizado.
+        Lança ValidationError quando o payload é inválido.
+    """
+    validate = _compile(schema, "")
+
+    def validate_payload(payload):
+        if not isinstance(payload, dict):
+            raise ValidationError("Nenhum dado JSON recebido")
+        return validate(payload, payload)
+
+    return validate_payload
+
+
+SECCOES_SCHEMA = {
+    "type": list,
+    "length": 3,
+    "normalize": _clean_secoes,
+}
+
+REPORT_REQUEST_SCHEMA = {
+    "type": dict,
+    "required": ["report_params", "nome_relatorio"],
+    "required_unless": "base_task_id",
+    "fields": {
+        "report_params": {
+            "type": dict,
+            "required": ["seccoes"],
+            "required_unless": "base_task_id",
+            "fields": {
+                "seccoes": SECCOES_SCHEMA,
+                "tipo_relatorio": {"type": str},
+                "processo_tipo": {"type": str},
+            },
+        },
+        "nome_relatorio": {"type": str},
+        "cover_image_id": {"type": (str, type(None))},
+        "base_task_id": {"type": (str, type(None))},
+        "sharepoint_id": {"type": (str, int, type(None))},
+        "profile": {"type": bool},
+    },
+}
+
+REPORT_PREVIEW_SCHEMA = {
+    "type": dict,
+    "required": ["report_params"],
+    "fields": {
+        "report_params": {
+            "type": dict,
+            "required": ["seccoes"],
+            "fields": REPORT_REQUEST_SCHEMA["fields"]["report_params"]["fields"],
+        },
+    },
+}
+
+# Validadores compilados na importação do módulo
+validate_report_request = compile_schema(REPORT_REQUEST_SCHEMA)
+validate_preview_request = compile_schema(REPORT_PREVIEW_SCHEMA)